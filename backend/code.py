@@ -1,4 +1,165 @@
-from backend.gdbmi import GdbMI, GdbMIManager
+import json
+import os
+import struct
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import Future
+from threading import Lock
+
+from loguru import logger
+
+from backend.elf import binaryIdentity, executableRanges
+from backend.gdbmi import GdbMI, GdbMIManager, miQuote
+from misc import misc
+
+# instructions already disassembled, by address. only the binary's own code
+# sections get cached: that code doesn't change between stops (unless it
+# modifies itself), so it lives as long as the binary does
+class DisassemblyCache:
+    # the longest x86 instruction is 15 bytes
+    MAX_INSTRUCTION_SIZE = 16
+
+    def __init__(self, identity: str | None = None, persistent: bool = False, regions: list[tuple[int, int]] | None = None):
+        self.identity = identity
+        self.persistent = persistent and identity is not None
+
+        # sorted [start, end) ranges it can hold, touching ones merged
+        self.regions: list[list[int]] = []
+        for start, end in sorted(regions or []):
+            if (self.regions and start <= self.regions[-1][1]):
+                self.regions[-1][1] = max(self.regions[-1][1], end)
+            else:
+                self.regions.append([start, end])
+
+        self.instructions: dict[int, dict] = {}
+        # sorted instruction addresses
+        self.addresses: list[int] = []
+        # sorted, non overlapping [start, end) ranges we have everything for
+        self.ranges: list[list[int]] = []
+        # something to save
+        self.modified = False
+
+        if (self.persistent):
+            self.load()
+
+    def path(self) -> str:
+        return os.path.join(misc.cacheDir(), f"disassembly-{self.identity}.json")
+
+    def clear(self):
+        self.instructions.clear()
+        self.addresses.clear()
+        self.ranges.clear()
+        self.modified = True
+
+    # True if [start, end) is all inside one of the regions
+    def covers(self, start: int, end: int) -> bool:
+        i = bisect_right(self.regions, [start, float("inf")]) - 1
+        return i >= 0 and self.regions[i][0] <= start and end <= self.regions[i][1]
+
+    # forgets [start, end) and the instructions that can run into it
+    def discard(self, start: int, end: int):
+        start = max(start - self.MAX_INSTRUCTION_SIZE + 1, 0)
+
+        first = bisect_left(self.addresses, start)
+        last = bisect_left(self.addresses, end)
+        for address in self.addresses[first:last]:
+            del self.instructions[address]
+        del self.addresses[first:last]
+
+        ranges = []
+        for rangeStart, rangeEnd in self.ranges:
+            if (rangeEnd <= start or rangeStart >= end):
+                ranges.append([rangeStart, rangeEnd])
+                continue
+            if (rangeStart < start):
+                ranges.append([rangeStart, start])
+            if (rangeEnd > end):
+                ranges.append([end, rangeEnd])
+        self.ranges = ranges
+        self.modified = True
+
+    # the parts of [start, end) we don't have yet
+    def gaps(self, start: int, end: int) -> list[tuple[int, int]]:
+        gaps = []
+        i = max(bisect_right(self.ranges, [start]) - 1, 0)
+        for rangeStart, rangeEnd in self.ranges[i:]:
+            if (rangeStart >= end):
+                break
+            if (rangeEnd <= start):
+                continue
+            if (rangeStart > start):
+                gaps.append((start, rangeStart))
+            start = max(start, rangeEnd)
+
+        if (start < end):
+            gaps.append((start, end))
+
+        return gaps
+
+    # where to start disassembling to fill a gap: a gap can start in the middle
+    # of the last instruction we have, so start from that one
+    def fetchStart(self, gapStart: int) -> int:
+        i = bisect_left(self.addresses, gapStart)
+        if (i > 0 and gapStart - self.addresses[i - 1] < self.MAX_INSTRUCTION_SIZE):
+            return self.addresses[i - 1]
+
+        return gapStart
+
+    def add(self, start: int, end: int, instructions: list[dict]):
+        for instruction in instructions:
+            address = int(instruction["address"], 16)
+            if (address not in self.instructions):
+                insort(self.addresses, address)
+            self.instructions[address] = instruction
+        self.modified = True
+
+        # merge [start, end) with the ranges it touches
+        i = bisect_left(self.ranges, [start])
+        if (i > 0 and self.ranges[i - 1][1] >= start):
+            i -= 1
+        j = i
+        while (j < len(self.ranges) and self.ranges[j][0] <= end):
+            start = min(start, self.ranges[j][0])
+            end = max(end, self.ranges[j][1])
+            j += 1
+        self.ranges[i:j] = [[start, end]]
+
+    def get(self, start: int, end: int) -> list[dict]:
+        first = bisect_left(self.addresses, start)
+        last = bisect_left(self.addresses, end)
+
+        return [self.instructions[address] for address in self.addresses[first:last]]
+
+    def load(self):
+        try:
+            with open(self.path(), "r") as cacheFile:
+                saved = json.load(cacheFile)
+        except (OSError, ValueError):
+            return
+
+        self.clear()
+        for start, end in saved["ranges"]:
+            # from before it only kept code sections
+            if (self.covers(start, end)):
+                self.ranges.append([start, end])
+        for instruction in saved["instructions"]:
+            address = int(instruction["address"], 16)
+            if (self.covers(address, address + 1)):
+                self.instructions[address] = instruction
+        self.addresses = sorted(self.instructions)
+        self.modified = False
+
+    def save(self):
+        if (not self.persistent or not self.modified):
+            return
+
+        try:
+            with open(self.path(), "w") as cacheFile:
+                json.dump({"ranges": self.ranges, "instructions": list(self.instructions.values())}, cacheFile)
+        except OSError as e:
+            logger.warning(f"Couldn't save the disassembly cache: {e}")
+            return
+
+        self.modified = False
 
 class CodeManager(GdbMIManager):
 
@@ -6,18 +167,143 @@ class CodeManager(GdbMIManager):
         super().__init__(gdbMI)
         self.GDBMI_TOKEN = "COD"
 
-    def setBreakpoint(self, position: str):
+        self.disassemblyCache = DisassemblyCache()
+        # the reader thread invalidates it while the worker reads it
+        self.disassemblyLock = Lock()
+        # bumped on every invalidation, disassembly asked for before that doesn't get cached
+        self.disassemblyGeneration = 0
+
+        # GDB's breakpoint table, by number, kept up to date from the results
+        # of our commands and from GDB's notifications instead of -break-list
+        self.breakpointTable: dict[str, dict] = {}
+        self.breakpointsLock = Lock()
+        self.breakpointsLoaded = False
+        # breakpoints GDB sent a new hit count for since the target last resumed
+        self.breakpointsModified: set[str] = set()
+
+        gdbMI.addRecordListener(self.onRecord)
+
+    def onRecord(self, record: dict):
+        if (record.get("type") != "notify"):
+            return
+
+        message = record.get("message")
+        payload = record.get("payload") or {}
+
+        # the target (or someone at GDB's console) wrote over some code
+        if (message == "memory-changed" and "addr" in payload):
+            self.invalidateDisassembly(int(payload["addr"], 0), int(payload.get("len", "1"), 0))
+            return
+
+        with self.breakpointsLock:
+            if (message in ("breakpoint-created", "breakpoint-modified") and "bkpt" in payload):
+                self.breakpointTable[payload["bkpt"]["number"]] = payload["bkpt"]
+                self.breakpointsModified.add(payload["bkpt"]["number"])
+            elif (message == "breakpoint-deleted"):
+                self.breakpointTable.pop(payload.get("id"), None)
+            elif (message == "running"):
+                self.breakpointsModified.clear()
+            elif (message == "stopped" and payload.get("bkptno") in self.breakpointTable):
+                # newer GDBs already sent the new count with =breakpoint-modified
+                number = payload["bkptno"]
+                if (number not in self.breakpointsModified):
+                    bkpt = dict(self.breakpointTable[number])
+                    bkpt["times"] = str(int(bkpt.get("times", "0")) + 1)
+                    self.breakpointTable[number] = bkpt
+
+    def onBreakpointInserted(self, future: Future):
+        if (future.exception() is not None):
+            return
+
+        response = future.result()
+        if (response.get("message") == "done" and "bkpt" in response["payload"]):
+            with self.breakpointsLock:
+                self.breakpointTable[response["payload"]["bkpt"]["number"]] = response["payload"]["bkpt"]
+
+    def loadBreakpointList(self, response: dict):
+        if (response.get("message") != "done"):
+            return
+
+        body = response["payload"].get("BreakpointTable", {}).get("body", [])
+        with self.breakpointsLock:
+            self.breakpointTable = {bkpt["number"]: bkpt for bkpt in body}
+            self.breakpointsLoaded = True
+
+    # the table in breakpoint number order
+    def breakpointList(self) -> list[dict]:
+        with self.breakpointsLock:
+            bkpts = list(self.breakpointTable.values())
+
+        return sorted(bkpts, key=lambda b: [int(n) if n.isdigit() else 0 for n in b["number"].split(".")])
+
+    # the cache is only valid for one build of the program, and only for its code
+    def setBinary(self, path: str, persistent: bool = False):
+        try:
+            regions = executableRanges(path)
+        except (OSError, IndexError, ValueError, struct.error) as e:
+            logger.warning(f"Couldn't read the code sections of {path}: {e}")
+            regions = []
+
+        cache = DisassemblyCache(binaryIdentity(path), persistent, regions)
+        with self.disassemblyLock:
+            previous = self.disassemblyCache
+            self.disassemblyCache = cache
+            self.disassemblyGeneration += 1
+
+        previous.save()
+
+    # on the way out, so the next session starts with it
+    def saveDisassembly(self):
+        with self.disassemblyLock:
+            self.disassemblyCache.save()
+
+    def loadExecutable(self, path: str, wait: bool = True):
+        return self.sendCmd(f"-file-exec-and-symbols {miQuote(path)}", wait)
+
+    def sourceScript(self, path: str, wait: bool = True):
+        return self.sendCmd(f"-interpreter-exec console {miQuote('source ' + path)}", wait)
+
+    # -f: a location GDB can't find yet (code not loaded, a module that
+    # isn't there) stays as a pending breakpoint instead of an error
+    def setBreakpoint(self, position: str, wait: bool = True):
         try:
             address = int(position)
-            return self.sendCmd(f"-break-insert *{hex(address)}")
+            future = self.sendCmd(f"-break-insert -f *{hex(address)}", wait=False)
         except ValueError:
-            return self.sendCmd(f"-break-insert {position}")
+            future = self.sendCmd(f"-break-insert -f {position}", wait=False)
+
+        future.add_done_callback(self.onBreakpointInserted)
+        if (not wait):
+            return future
+
+        return self.gdbMI.waitFor(future)
 
     def delBreakpoint(self, breakpointNumber: int):
-        return self.sendCmd(f"-break-delete {breakpointNumber}")
+        return self.delBreakpoints([breakpointNumber])
+
+    # all of them leave in one write
+    def setBreakpoints(self, positions: list[str]) -> list[dict]:
+        with self.gdbMI.batch():
+            requests = [self.setBreakpoint(position, wait=False) for position in positions]
+
+        return [self.gdbMI.waitFor(request) for request in requests]
 
-    def getBreakpoints(self):
-        return self.sendCmd("-break-list")
+    # GDB takes any number of them in one -break-delete
+    def delBreakpoints(self, breakpointNumbers: list[int]) -> dict | None:
+        # a bare -break-delete deletes every breakpoint
+        if (not breakpointNumbers):
+            return None
+
+        response = self.sendCmd("-break-delete " + " ".join(str(n) for n in breakpointNumbers))
+        if (response.get("message") == "done"):
+            with self.breakpointsLock:
+                for number in breakpointNumbers:
+                    self.breakpointTable.pop(str(number), None)
+
+        return response
+
+    def getBreakpoints(self, wait: bool = True):
+        return self.sendCmd("-break-list", wait)
 
     def continueExecution(self):
         return self.sendCmd("-exec-continue")
@@ -37,6 +323,69 @@ class CodeManager(GdbMIManager):
     def stepOut(self):
         return self.sendCmd("-exec-finish")
 
-    def disassemble(self, startAddress: int, bytes: int):
+    # startAddress can also be a GDB expression, like "$pc"
+    def disassemble(self, startAddress: int | str, bytes: int, wait: bool = True):
+        if (type(startAddress) is int):
+            endAddress = startAddress + bytes
+        else:
+            endAddress = f"{startAddress}+{bytes}"
+
+        return self.sendCmd(f"-data-disassemble -s {startAddress} -e {endAddress}", wait)
+
+    # same as disassemble(), but only what isn't cached gets asked to GDB.
+    # outside the binary's code sections it's always asked for
+    def disassembleCached(self, startAddress: int, bytes: int) -> list[dict]:
         endAddress = startAddress + bytes
-        return self.sendCmd(f"-data-disassemble -s {startAddress} -e {endAddress}")
+
+        with self.disassemblyLock:
+            cache = self.disassemblyCache
+            generation = self.disassemblyGeneration
+            if (not cache.covers(startAddress, endAddress)):
+                gaps = None
+            else:
+                gaps = [(gapStart, gapEnd, cache.fetchStart(gapStart)) for gapStart, gapEnd in cache.gaps(startAddress, endAddress)]
+
+        if (gaps is None):
+            return self.disassembleUncached(startAddress, bytes)
+
+        requests = []
+        with self.gdbMI.batch():
+            for gapStart, gapEnd, fetchStart in gaps:
+                requests.append((gapStart, gapEnd, self.disassemble(fetchStart, gapEnd - fetchStart, wait=False)))
+
+        responses = []
+        for gapStart, gapEnd, request in requests:
+            response = self.gdbMI.waitFor(request)
+            if (response.get("message") != "done"):
+                logger.debug(f"Can't disassemble {hex(gapStart)}-{hex(gapEnd)}: {response.get('payload')}")
+                continue
+
+            responses.append((gapStart, gapEnd, response["payload"].get("asm_insns", [])))
+
+        with self.disassemblyLock:
+            # written over while we were waiting, what we got may be old already
+            if (generation == self.disassemblyGeneration):
+                for gapStart, gapEnd, instructions in responses:
+                    cache.add(gapStart, gapEnd, instructions)
+
+                return cache.get(startAddress, endAddress)
+
+        return self.disassembleUncached(startAddress, bytes)
+
+    def disassembleUncached(self, startAddress: int, bytes: int) -> list[dict]:
+        response = self.disassemble(startAddress, bytes)
+        if (response.get("message") != "done"):
+            logger.debug(f"Can't disassemble {hex(startAddress)}-{hex(startAddress + bytes)}: {response.get('payload')}")
+            return []
+
+        return response["payload"].get("asm_insns", [])
+
+    # for code that changes at runtime: all of it, or count bytes from address
+    def invalidateDisassembly(self, address: int | None = None, count: int = 0):
+        with self.disassemblyLock:
+            self.disassemblyGeneration += 1
+
+            if (address is None):
+                self.disassemblyCache.clear()
+            else:
+                self.disassemblyCache.discard(address, address + count)
@@ -1,19 +1,137 @@
+from concurrent.futures import Future
+from threading import Lock
+
 from backend.gdbmi import GdbMI, GdbMIManager
 
+# "2" before "10", and "1.2" (inferior 1, thread 2) works too
+def threadOrder(thread: dict) -> list[int]:
+    return [int(part) if part.isdigit() else 0 for part in thread["id"].split(".")]
+
 class CPUManager(GdbMIManager):
+    # with more than this share of the threads changed, one -thread-info for
+    # all of them is cheaper than one per thread
+    FULL_REFRESH_RATIO = 0.5
 
     def __init__(self, gdbMI: GdbMI):
         super().__init__(gdbMI)
         self.GDBMI_TOKEN = "CPU"
 
-    def getThreadInfo(self):
-        return self.sendCmd("-thread-info")
+        # thread id -> the thread as -thread-info gives it, kept up to date
+        # from the async records. dirtyThreads are the ones whose frame we
+        # don't know anymore
+        self.threads: dict[str, dict] = {}
+        self.dirtyThreads: set[str] = set()
+        self.currentThread = ""
+        self.threadsLoaded = False
+        self.threadsLock = Lock()
+
+        gdbMI.addRecordListener(self.onRecord)
+
+    def onRecord(self, record: dict):
+        if (record.get("type") != "notify"):
+            return
+
+        message = record.get("message")
+        payload = record.get("payload") or {}
+
+        with self.threadsLock:
+            if (message == "thread-created"):
+                self.threads[payload["id"]] = {"id": payload["id"], "state": "stopped"}
+                self.dirtyThreads.add(payload["id"])
+            elif (message == "thread-exited"):
+                self.threads.pop(payload.get("id"), None)
+                self.dirtyThreads.discard(payload.get("id"))
+            elif (message == "thread-selected"):
+                self.currentThread = payload.get("id", self.currentThread)
+            elif (message == "running"):
+                for thread in self.affectedThreads(payload.get("thread-id", "all")):
+                    thread["state"] = "running"
+                    thread.pop("frame", None)
+            elif (message == "stopped"):
+                self.onStopped(payload)
+
+    # called with threadsLock held
+    def affectedThreads(self, ids: str | list[str]) -> list[dict]:
+        if (ids == "all"):
+            return list(self.threads.values())
+
+        ids = [ids] if isinstance(ids, str) else ids
+        return [self.threads[i] for i in ids if i in self.threads]
+
+    # called with threadsLock held
+    def onStopped(self, payload: dict):
+        stopped = self.affectedThreads(payload.get("stopped-threads", payload.get("thread-id", "all")))
+        reporter = payload.get("thread-id")
+
+        for thread in stopped:
+            thread["state"] = "stopped"
+            # the one that reported the stop sent its frame along
+            if (thread["id"] == reporter and "frame" in payload):
+                thread["frame"] = payload["frame"]
+                self.dirtyThreads.discard(reporter)
+            else:
+                self.dirtyThreads.add(thread["id"])
+
+        if (reporter):
+            self.currentThread = reporter
+
+    def getThreadInfo(self, thread: str | None = None, wait: bool = True):
+        return self.sendCmd(f"-thread-info {thread}" if thread else "-thread-info", wait)
+
+    # only the threads that changed since the last time, or all of them if
+    # that's cheaper. call inside a batch() block
+    def requestThreads(self) -> dict[str, Future]:
+        with self.threadsLock:
+            full = (not self.threadsLoaded or len(self.dirtyThreads) > len(self.threads) * self.FULL_REFRESH_RATIO)
+            dirty = list(self.dirtyThreads)
+            self.dirtyThreads.clear()
+
+        if (full):
+            return {"": self.getThreadInfo(wait=False)}
+
+        return {thread: self.getThreadInfo(thread, wait=False) for thread in dirty}
+
+    # -thread-info's payload, for every thread
+    def collectThreads(self, requests: dict[str, Future]) -> dict:
+        responses = {thread: self.gdbMI.waitFor(request) for thread, request in requests.items()}
+
+        with self.threadsLock:
+            for thread, response in responses.items():
+                payload = response.get("payload") or {}
+                if (response.get("message") != "done"):
+                    # gone before we asked
+                    self.threads.pop(thread, None)
+                    continue
+
+                if (thread == ""):
+                    self.threads = {t["id"]: dict(t) for t in payload.get("threads", [])}
+                    self.currentThread = payload.get("current-thread-id", self.currentThread)
+                    self.threadsLoaded = True
+                else:
+                    for t in payload.get("threads", []):
+                        self.threads[t["id"]] = dict(t)
+
+            return {
+                "threads": [dict(t) for t in sorted(self.threads.values(), key=threadOrder)],
+                "current-thread-id": self.currentThread
+            }
+
+    def refreshThreads(self) -> dict:
+        with self.gdbMI.batch():
+            requests = self.requestThreads()
+
+        return self.collectThreads(requests)
+
+    def getRegisterNames(self, wait: bool = True):
+        return self.sendCmd("-data-list-register-names", wait)
 
-    def getRegisterNames(self):
-        return self.sendCmd("-data-list-register-names")
+    # no register numbers means all of them
+    def getRegisterValues(self, registers: list[int] | None = None, wait: bool = True):
+        command = "-data-list-register-values x"
+        if (registers):
+            command += " " + " ".join(str(r) for r in registers)
 
-    def getRegisterValues(self):
-        return self.sendCmd("-data-list-register-values x")
+        return self.sendCmd(command, wait)
 
-    def showUpdatedRegisters(self):
-        return self.sendCmd("-data-list-changed-registers")
+    def showUpdatedRegisters(self, wait: bool = True):
+        return self.sendCmd("-data-list-changed-registers", wait)
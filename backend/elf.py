@@ -0,0 +1,153 @@
+import hashlib
+import os
+import struct
+
+SHT_SYMTAB = 2
+SHT_NOTE = 7
+SHT_DYNSYM = 11
+NT_GNU_BUILD_ID = 3
+STT_OBJECT = 1
+STT_FUNC = 2
+SHF_EXECINSTR = 0x4
+# section indexes from here up are special (absolute, common, ...)
+SHN_LORESERVE = 0xff00
+
+# reads the ELF header of an open file: (is64, endian) or None if it's not an ELF
+def elfClass(elf) -> tuple[bool, str] | None:
+    elf.seek(0)
+    ident = elf.read(16)
+    if (len(ident) < 16 or ident[:4] != b"\x7fELF"):
+        return None
+
+    return ident[4] == 2, "<" if ident[5] == 1 else ">"
+
+# (type, offset, size, link, entsize, address, flags) of every section
+def sectionHeaders(elf, is64: bool, endian: str) -> list[tuple[int, int, int, int, int, int, int]]:
+    if (is64):
+        elf.seek(0x28)
+        shoff, = struct.unpack(endian + "Q", elf.read(8))
+        elf.seek(0x3a)
+    else:
+        elf.seek(0x20)
+        shoff, = struct.unpack(endian + "I", elf.read(4))
+        elf.seek(0x2e)
+    shentsize, shnum = struct.unpack(endian + "HH", elf.read(4))
+
+    elf.seek(shoff)
+    table = elf.read(shentsize * shnum)
+    headers = []
+    for i in range(shnum):
+        if (is64):
+            shtype, flags, address, offset, size, link, _, _, entsize = struct.unpack_from(
+                endian + "IQQQQIIQQ", table, i * shentsize + 4)
+        else:
+            shtype, flags, address, offset, size, link, _, _, entsize = struct.unpack_from(
+                endian + "IIIIIIIII", table, i * shentsize + 4)
+        headers.append((shtype, offset, size, link, entsize, address, flags))
+
+    return headers
+
+# the GNU build-id note of an ELF file, None if it doesn't have one
+def buildId(path: str) -> str | None:
+    with open(path, "rb") as elf:
+        header = elfClass(elf)
+        if (header is None):
+            return None
+        is64, endian = header
+
+        for shtype, offset, size, _, _, _, _ in sectionHeaders(elf, is64, endian):
+            if (shtype != SHT_NOTE):
+                continue
+
+            elf.seek(offset)
+            notes = elf.read(size)
+            pos = 0
+            while (pos + 12 <= len(notes)):
+                namesz, descsz, notetype = struct.unpack_from(endian + "III", notes, pos)
+                pos += 12
+                name = notes[pos:pos + namesz]
+                pos += (namesz + 3) & ~3
+                desc = notes[pos:pos + descsz]
+                pos += (descsz + 3) & ~3
+
+                if (notetype == NT_GNU_BUILD_ID and name == b"GNU\0"):
+                    return desc.hex()
+
+    return None
+
+# functions and variables from the symbol table (the dynamic one if the binary
+# is stripped) as (address, size, name, "F" or "V"), None if it's not an ELF.
+# labels (size 0) get the size up to the end of their section, the nearest
+# symbol before an address still wins when looking it up
+def readSymbols(path: str) -> list[tuple[int, int, str, str]] | None:
+    with open(path, "rb") as elf:
+        header = elfClass(elf)
+        if (header is None):
+            return None
+        is64, endian = header
+
+        sections = sectionHeaders(elf, is64, endian)
+        tables = [s for s in sections if s[0] == SHT_SYMTAB] or [s for s in sections if s[0] == SHT_DYNSYM]
+
+        symbols = []
+        for _, offset, size, link, entsize, _, _ in tables:
+            elf.seek(offset)
+            table = elf.read(size)
+            _, strOffset, strSize, _, _, _, _ = sections[link]
+            elf.seek(strOffset)
+            strings = elf.read(strSize)
+
+            if (is64):
+                layout = struct.Struct(endian + "IBBHQQ")
+                entries = ((n, v, sz, info, shndx) for n, info, _, shndx, v, sz in layout.iter_unpack(table[:len(table) - len(table) % layout.size]))
+            else:
+                layout = struct.Struct(endian + "IIIBBH")
+                entries = ((n, v, sz, info, shndx) for n, v, sz, info, _, shndx in layout.iter_unpack(table[:len(table) - len(table) % layout.size]))
+
+            for nameOffset, value, symSize, info, shndx in entries:
+                kind = info & 0xf
+                if (shndx == 0 or value == 0 or kind not in (STT_FUNC, STT_OBJECT)):
+                    continue
+
+                if (symSize == 0 and shndx < min(len(sections), SHN_LORESERVE)):
+                    _, _, sectionSize, _, _, sectionAddress, _ = sections[shndx]
+                    symSize = max(sectionAddress + sectionSize - value, 0)
+
+                name = strings[nameOffset:strings.index(b"\0", nameOffset)].decode(errors="replace")
+                symbols.append((value, symSize, name, "F" if kind == STT_FUNC else "V"))
+
+    return symbols
+
+# [start, end) of the sections with code in them, sorted. what's loaded there
+# comes from the binary, everything else (firmware, a bootloader, code the
+# program writes) can change under it. empty if it's not an ELF
+def executableRanges(path: str) -> list[tuple[int, int]]:
+    with open(path, "rb") as elf:
+        header = elfClass(elf)
+        if (header is None):
+            return []
+        is64, endian = header
+
+        return sorted((address, address + size) for _, _, size, _, _, address, flags in sectionHeaders(elf, is64, endian)
+                      if flags & SHF_EXECINSTR and address and size)
+
+# something that changes whenever the binary does: the build-id if there is
+# one, otherwise path, size and modification time. a half written ELF (in
+# the middle of a rebuild) is one that has no build-id
+def binaryIdentity(path: str) -> str:
+    try:
+        identity = buildId(path)
+    except (OSError, IndexError, ValueError, struct.error):
+        identity = None
+
+    if (identity):
+        return identity
+
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+        key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        key = path
+
+    return hashlib.sha1(key.encode()).hexdigest()
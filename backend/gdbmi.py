@@ -1,21 +1,69 @@
-from typing_extensions import Any
-from pygdbmi import constants
+import os
+import re
+import select
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from typing_extensions import Any, Callable, Iterator
+from pygdbmi import constants, gdbmiparser
 from pygdbmi.gdbcontroller import GdbController
 
-from threading import Lock
+from itertools import count
+from threading import Lock, Thread, local
 
 from loguru import logger
 
+from backend.stats import GdbStats
+
+# quotes an expression so GDB takes it as a single argument
+def miQuote(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+# turns raw GDB output into records one line at a time. bytes are kept in
+# one growing buffer and searched only once for newlines, so a huge record
+# (memory dumps, symbol lists) doesn't get copied over and over while it arrives
+class MIStreamParser:
+    def __init__(self, stream: str = "stdout"):
+        self.stream = stream
+        self.buffer = bytearray()
+        # how much of the buffer has no newline in it
+        self.scanned = 0
+
+    def feed(self, data: bytes) -> Iterator[dict]:
+        self.buffer += data
+        start = 0
+
+        while True:
+            end = self.buffer.find(b"\n", max(start, self.scanned))
+            if (end < 0):
+                break
+
+            line = self.buffer[start:end].decode(errors="replace").rstrip("\r")
+            start = end + 1
+
+            if (not line or gdbmiparser.response_is_finished(line)):
+                continue
+
+            record = gdbmiparser.parse_response(line)
+            record["stream"] = self.stream
+            yield record
+
+        del self.buffer[:start]
+        self.scanned = len(self.buffer)
+
 class GdbMI:
-    GDBMI_TOKENS = {
-        "COD": 00,
-        "CPU": 10,
-        "SYM": 20,
-        "MEM": 30
-    }
+    # seconds a caller waits for the result record of its command
+    RESPONSE_TIMEOUT = 10
+    # seconds GDB gets to exit on its own
+    QUIT_TIMEOUT = 2
+    # seconds the reader thread sleeps in select() between checks
+    READ_INTERVAL = 0.1
+    READ_SIZE = 64 * 1024
 
-    def __init__(self, gdbArgs: list[str]):
-        gdbCommand = ["gdb", "--interpreter=mi2"]
+    # command replaces `gdb --interpreter=mi2`, e.g. for another GDB build
+    # or tools/fake_gdb.py
+    def __init__(self, gdbArgs: list[str], command: list[str] | None = None):
+        gdbCommand = list(command) if command else ["gdb", "--interpreter=mi2"]
 
         if (gdbArgs):
             gdbCommand.extend(gdbArgs)
@@ -23,39 +71,197 @@ class GdbMI:
         self.gdbmi = GdbController(command=gdbCommand)
         self.lock = Lock()
 
-    def readResponse(self, attempts: int):
-        att = attempts
-        responses = {}
-        self.lock.acquire()
-        while True:
-            try:
-                responses = self.gdbmi.get_gdb_response(timeout_sec=1)
-                break
-            except constants.GdbTimeoutError:
-                logger.debug("Waiting...")
-                if (att > 0):
-                    att -= 1
-                    continue
+        # every command gets its own token, starting from 1 so it never gets lost
+        # when formatted. the manager that sent it ("COD", "CPU", ...) is kept
+        # aside by the stats, along with when it was sent
+        self.tokens = count(1)
+        self.stats = GdbStats()
+
+        # commands waiting for their ^done/^error/... record, by token
+        self.pending: dict[int, Future] = {}
+        self.pendingLock = Lock()
+
+        # commands sent inside batch(), per thread
+        self.local = local()
+
+        # called from the reader thread with everything that is not a result
+        # record (async, stream and target output). nothing is kept around,
+        # whoever wants records listens for them. replaced, never changed in
+        # place, so the reader can go through it without a lock
+        self.recordListeners: list[Callable[[dict], None]] = []
 
-                if (att == -1):
+        self.running = True
+        self.reader = Thread(target=self.readLoop, name="gdbmi-reader", daemon=True)
+        self.reader.start()
+
+    def readLoop(self):
+        if (constants.USING_WINDOWS):
+            self.pollLoop()
+        else:
+            self.selectLoop()
+
+        self.running = False
+        self.failPending(EOFError("GDB is not running"))
+
+    def selectLoop(self):
+        io = self.gdbmi.io_manager
+        parsers = {io.stdout_fileno: MIStreamParser("stdout")}
+        if (io.stderr_fileno >= 0):
+            parsers[io.stderr_fileno] = MIStreamParser("stderr")
+
+        while self.running:
+            ready, _, _ = select.select(list(parsers), [], [], self.READ_INTERVAL)
+            for fd in ready:
+                try:
+                    data = os.read(fd, self.READ_SIZE)
+                except BlockingIOError:
                     continue
 
-                logger.warning("No more attempts.")
-                break
+                if (not data):
+                    logger.warning("GDB exited")
+                    return
+
+                self.stats.dataRead(len(data))
+                # records get handed out as soon as their line is complete
+                for record in parsers[fd].feed(data):
+                    self.dispatch(record)
 
-        self.lock.release()
-        return responses
+    # no select() on pipes on Windows, let pygdbmi poll instead
+    def pollLoop(self):
+        io = self.gdbmi.io_manager
+        while self.running:
+            for record in io.get_gdb_response(timeout_sec=self.READ_INTERVAL, raise_error_on_timeout=False):
+                self.dispatch(record)
 
-    # TODO: queue commands
-    def sendCmd(self, command: str):
-        self.lock.acquire()
-        resp = self.gdbmi.write(f"{command}")
-        self.lock.release()
+            if (self.gdbmi.gdb_process is None or self.gdbmi.gdb_process.poll() is not None):
+                logger.warning("GDB exited")
+                return
 
-        return resp
+    def dispatch(self, record: dict):
+        if (record.get("type") == "result"):
+            token = record.get("token")
+            with self.pendingLock:
+                future = self.pending.pop(token, None)
 
-    def quit(self):
-        return self.sendCmd("-gdb-exit")
+            if (future is not None):
+                self.stats.commandDone(token, record.get("message") or "")
+                future.set_result(record)
+                return
+
+            logger.debug(f"Result with no one waiting for it: {record}")
+
+        for listener in self.recordListeners:
+            try:
+                listener(record)
+            except Exception:
+                logger.exception("Record listener failed")
+
+    def addRecordListener(self, listener: Callable[[dict], None]):
+        self.recordListeners = self.recordListeners + [listener]
+
+    def removeRecordListener(self, listener: Callable[[dict], None]):
+        self.recordListeners = [l for l in self.recordListeners if l is not listener]
+
+    def failPending(self, error: Exception):
+        with self.pendingLock:
+            waiting = list(self.pending.values())
+            self.pending.clear()
+        self.stats.abandonAll()
+
+        for future in waiting:
+            future.set_exception(error)
+
+    def sendCmdAsync(self, command: str, category: str = "") -> Future:
+        future = Future()
+        if (not self.running):
+            future.set_exception(EOFError("GDB is not running"))
+            return future
+
+        # tokens are ours, drop any the caller wrote by hand
+        command = re.sub(r"^\d+", "", command)
+        token = next(self.tokens)
+
+        # for waitFor(), when it has to give up on it
+        future.token = token
+        future.command = command
+
+        # register before writing, or the reader could see the answer first
+        with self.pendingLock:
+            self.pending[token] = future
+        self.stats.commandSent(token, command, category)
+
+        batch = getattr(self.local, "batch", None)
+        if (batch is not None):
+            batch.append(f"{token}{command}")
+            return future
+
+        self.write([f"{token}{command}"])
+
+        return future
+
+    # commands sent from this thread inside the block go out in a single write
+    # when it ends. only use sendCmdAsync() in here, sendCmd() would wait forever.
+    # blocks can nest, everything goes out when the outermost one ends
+    @contextmanager
+    def batch(self):
+        if (getattr(self.local, "batch", None) is not None):
+            yield
+            return
+
+        self.local.batch = []
+        try:
+            yield
+        finally:
+            commands = self.local.batch
+            self.local.batch = None
+
+            if (commands):
+                self.write(commands)
+
+    def write(self, commands: list[str]):
+        with self.lock:
+            self.gdbmi.write(commands, read_response=False)
+        self.stats.dataWritten(sum(len(command) + 1 for command in commands))
+
+    # every wait for a result record goes through here. a command that timed
+    # out is given up on: a late answer goes nowhere and it's no longer in flight
+    def waitFor(self, future: Future, timeout: float | None = None) -> dict:
+        timeout = self.RESPONSE_TIMEOUT if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            token = getattr(future, "token", None)
+            with self.pendingLock:
+                abandoned = self.pending.pop(token, None)
+
+            # the reader took it in the meantime, the result is on its way
+            if (abandoned is None and token is not None):
+                return future.result()
+
+            self.stats.timedOut(token)
+            error = constants.GdbTimeoutError(f"No response to '{getattr(future, 'command', '?')}' after {timeout} seconds")
+            future.set_exception(error)
+            raise error
+
+    def sendCmd(self, command: str, category: str = "", timeout: float = RESPONSE_TIMEOUT) -> dict:
+        return self.waitFor(self.sendCmdAsync(command, category), timeout)
+
+    # a GDB that doesn't answer -gdb-exit in time gets killed
+    def quit(self, timeout: float = QUIT_TIMEOUT) -> dict | None:
+        try:
+            return self.sendCmd("-gdb-exit", timeout=timeout)
+        except constants.GdbTimeoutError:
+            logger.warning("GDB didn't exit, killing it")
+            self.kill()
+            return None
+        finally:
+            self.running = False
+
+    def kill(self):
+        self.running = False
+        process = self.gdbmi.gdb_process
+        if (process is not None and process.poll() is None):
+            process.kill()
 
 # this class can manage a component of the GDB-MI
 class GdbMIManager:
@@ -67,11 +273,15 @@ class GdbMIManager:
 
         self.gdbMI = gdbMI
 
-    def token(self):
-        return GdbMI.GDBMI_TOKENS[self.GDBMI_TOKEN]
+    # wait=False gives back a Future instead of the result record
+    def sendCmd(self, command: str, wait: bool = True):
+        if (not wait):
+            return self.sendCmdAsync(command)
+
+        return self.gdbMI.sendCmd(command, self.GDBMI_TOKEN)
 
-    def sendCmd(self, command: str):
-        return self.gdbMI.sendCmd(f"{self.token()}{command}")
+    def sendCmdAsync(self, command: str) -> Future:
+        return self.gdbMI.sendCmdAsync(command, self.GDBMI_TOKEN)
 
     def selectResponse(self, gdbMIResponse: dict | list, *keys: tuple[str, Any]) -> dict:
         keysCount = len(keys)
@@ -1,10 +1,125 @@
+from collections import OrderedDict
+from threading import Lock
+
+from loguru import logger
+from typing_extensions import Callable
+
 from backend.gdbmi import GdbMI, GdbMIManager
 
 class MemoryManager(GdbMIManager):
+    PAGE_SIZE = 4096
+    # 4 MiB of target memory at most
+    MAX_PAGES = 1024
 
     def __init__(self, gdbMI: GdbMI):
         super().__init__(gdbMI)
         self.GDBMI_TOKEN = "MEM"
 
-    def readMemory(self, address: str, offset: int = 0, count: int = 1):
-        return self.sendCmd(f"-data-read-memory-bytes -o {offset} {address} {count}")
+        # page number -> bytes readable from the start of the page (PAGE_SIZE
+        # if all of it, b"" if none), least recently used first
+        self.pages: OrderedDict[int, bytes] = OrderedDict()
+        self.pagesLock = Lock()
+        # bumped on every invalidation, reads started before that don't get cached
+        self.generation = 0
+
+        # called with (address, count) after we wrote to the target's memory
+        self.writeListeners: list[Callable[[int, int], None]] = []
+
+        gdbMI.addRecordListener(self.onRecord)
+
+    def onRecord(self, record: dict):
+        if (record.get("type") == "notify" and record.get("message") in ("running", "stopped", "memory-changed")):
+            self.invalidate()
+
+    def invalidate(self, address: int | None = None, count: int = 0):
+        with self.pagesLock:
+            self.generation += 1
+
+            if (address is None):
+                self.pages.clear()
+                return
+
+            for page in range(address // self.PAGE_SIZE, (address + count - 1) // self.PAGE_SIZE + 1):
+                self.pages.pop(page, None)
+
+    def readMemory(self, address: str, offset: int = 0, count: int = 1, wait: bool = True):
+        return self.sendCmd(f"-data-read-memory-bytes -o {offset} {address} {count}", wait)
+
+    def writeMemory(self, address: int, data: bytes):
+        response = self.sendCmd(f"-data-write-memory-bytes {hex(address)} {data.hex()}")
+        self.invalidate(address, len(data))
+        for listener in self.writeListeners:
+            listener(address, len(data))
+
+        return response
+
+    # reads through the page cache. stops early at the first byte GDB can't read
+    def readBytes(self, address: int, count: int) -> bytes:
+        if (count <= 0):
+            return b""
+
+        firstPage = address // self.PAGE_SIZE
+        lastPage = (address + count - 1) // self.PAGE_SIZE
+
+        with self.pagesLock:
+            generation = self.generation
+            found = {}
+            for page in range(firstPage, lastPage + 1):
+                if (page in self.pages):
+                    self.pages.move_to_end(page)
+                    found[page] = self.pages[page]
+
+        missing = [page for page in range(firstPage, lastPage + 1) if page not in found]
+        if (missing):
+            found.update(self.fetchPages(missing, generation))
+
+        chunks = []
+        for page in range(firstPage, lastPage + 1):
+            data = memoryview(found[page])
+            pageAddress = page * self.PAGE_SIZE
+            start = max(address - pageAddress, 0)
+            end = min(address + count - pageAddress, self.PAGE_SIZE)
+
+            chunks.append(data[start:end])
+            if (len(data) < end):
+                break
+
+        return b"".join(chunks)
+
+    # pages next to each other get read together, and all reads leave in one write
+    def fetchPages(self, pages: list[int], generation: int) -> dict[int, bytes]:
+        runs = []
+        for page in pages:
+            if (runs and runs[-1][1] == page):
+                runs[-1][1] = page + 1
+            else:
+                runs.append([page, page + 1])
+
+        with self.gdbMI.batch():
+            requests = [(first, last, self.readMemory(hex(first * self.PAGE_SIZE), 0, (last - first) * self.PAGE_SIZE, wait=False))
+                        for first, last in runs]
+
+        fetched = {}
+        for first, last, request in requests:
+            response = self.gdbMI.waitFor(request)
+            blocks = []
+            if (response.get("message") == "done"):
+                blocks = [(int(b["begin"], 16), bytes.fromhex(b["contents"])) for b in response["payload"]["memory"]]
+            else:
+                logger.debug(f"Can't read pages {hex(first)}-{hex(last)}: {response.get('payload')}")
+
+            for page in range(first, last):
+                pageAddress = page * self.PAGE_SIZE
+                fetched[page] = b""
+                for begin, data in blocks:
+                    if (begin <= pageAddress < begin + len(data)):
+                        fetched[page] = data[pageAddress - begin:pageAddress - begin + self.PAGE_SIZE]
+                        break
+
+        with self.pagesLock:
+            if (generation == self.generation):
+                self.pages.update(fetched)
+                while (len(self.pages) > self.MAX_PAGES):
+                    self.pages.popitem(last=False)
+
+        return fetched
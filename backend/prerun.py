@@ -0,0 +1,219 @@
+import codecs
+import os
+import re
+import signal
+import socket
+import subprocess
+import time
+from concurrent.futures import Future
+from threading import Event, Lock, Thread, Timer
+
+from typing_extensions import Callable
+
+from loguru import logger
+
+# runs a session's preRunCommands. every entry is a step, steps run one
+# after the other. a step is a command or a list of commands that don't
+# depend on each other, those run all at once:
+#
+#   "preRunCommands": ["make kernel", ["make iso", "make tools"]]
+#
+# a step can also be something that keeps running while we debug it, like
+# QEMU waiting for GDB. it's started, the next step starts once it listens
+# on a port or prints something (or right away, without either), and it's
+# stopped with the target:
+#
+#   {"command": "make debug-remote", "background": true, "waitForPort": 1234}
+#   {"command": "make debug-remote", "background": true, "waitForOutput": "Waiting for gdb"}
+#
+# the first step that fails (or a cancel) stops the rest
+class PreRunExecutor:
+    READ_SIZE = 64 * 1024
+    # after asking nicely, how long before they get killed
+    KILL_TIMEOUT = 3
+    # how long a background step has to get ready, unless it says otherwise
+    READY_TIMEOUT = 60
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, commands: list[str | list[str] | dict], onOutput: Callable[[str, str], None], cwd: str | None = None):
+        self.steps = [[command] if isinstance(command, str) else command if isinstance(command, dict) else list(command)
+                      for command in commands]
+        # called from the reader threads with (command, text)
+        self.onOutput = onOutput
+        self.cwd = cwd
+
+        self.processes: list[subprocess.Popen] = []
+        # the background steps', they outlive the executor's run
+        self.background: list[subprocess.Popen] = []
+        self.processesLock = Lock()
+        self.cancelled = False
+
+        # True once every command exited with 0
+        self.done: Future = Future()
+
+    def start(self) -> Future:
+        Thread(target=self.run, name="prerun", daemon=True).start()
+        return self.done
+
+    def run(self):
+        try:
+            success = all(self.runBackground(step) if isinstance(step, dict) else self.runStep(step)
+                          for step in self.steps if not self.cancelled)
+        except Exception as e:
+            logger.error(f"Pre-run commands failed: {e}")
+            success = False
+
+        self.done.set_result(success and not self.cancelled)
+
+    def runStep(self, step: list[str]) -> bool:
+        with self.processesLock:
+            if (self.cancelled):
+                return False
+
+            started = []
+            for command in step:
+                self.onOutput(command, f"$ {command}\n")
+                try:
+                    started.append((command, self.spawn(command)))
+                except OSError as e:
+                    self.onOutput(command, f"Couldn't run {command}: {e}\n")
+                    self.cancelAll([process for _, process in started])
+                    return False
+
+            self.processes = [process for _, process in started]
+
+        readers = [Thread(target=self.pump, args=(command, process), daemon=True) for command, process in started]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+
+        success = True
+        for command, process in started:
+            code = process.wait()
+            if (code != 0):
+                self.onOutput(command, f"{command} exited with {code}\n")
+                success = False
+
+        with self.processesLock:
+            self.processes = []
+
+        return success
+
+    # doesn't wait for it to exit, only for it to be ready
+    def runBackground(self, step: dict) -> bool:
+        command = step["command"]
+        pattern = re.compile(step["waitForOutput"]) if step.get("waitForOutput") else None
+        port = step.get("waitForPort")
+        ready = Event()
+        if (pattern is None and port is None):
+            ready.set()
+
+        with self.processesLock:
+            if (self.cancelled):
+                return False
+
+            self.onOutput(command, f"$ {command} &\n")
+            try:
+                process = self.spawn(command)
+            except OSError as e:
+                self.onOutput(command, f"Couldn't run {command}: {e}\n")
+                return False
+
+            self.background.append(process)
+
+        # output can come in any chunks, a line can be split between two
+        seen = ""
+        def onText(text: str):
+            nonlocal seen
+            if (pattern is not None and not ready.is_set()):
+                seen = (seen + text)[-self.READ_SIZE:]
+                if (pattern.search(seen)):
+                    ready.set()
+
+        def pumpUntilExit():
+            self.pump(command, process, onText)
+            code = process.wait()
+            if (not self.cancelled):
+                self.onOutput(command, f"{command} exited with {code}\n")
+
+        Thread(target=pumpUntilExit, name="prerun-background", daemon=True).start()
+
+        deadline = time.monotonic() + step.get("timeout", self.READY_TIMEOUT)
+        while (not ready.is_set()):
+            if (self.cancelled):
+                return False
+            if (process.poll() is not None):
+                # the reader can still be on its last chunk
+                time.sleep(self.POLL_INTERVAL)
+                if (not ready.is_set()):
+                    self.onOutput(command, f"{command} stopped before it was ready\n")
+                    return False
+                break
+            if (time.monotonic() > deadline):
+                self.onOutput(command, f"{command} wasn't ready after {step.get('timeout', self.READY_TIMEOUT)} seconds\n")
+                return False
+            if (port is not None and self.listening(step.get("host", "localhost"), int(port))):
+                ready.set()
+                break
+
+            ready.wait(self.POLL_INTERVAL)
+
+        return True
+
+    # connects and hangs up right away, QEMU's gdbstub takes the next connection fine
+    def listening(self, host: str, port: int) -> bool:
+        try:
+            with socket.create_connection((host, port), timeout=self.POLL_INTERVAL):
+                return True
+        except OSError:
+            return False
+
+    def spawn(self, command: str) -> subprocess.Popen:
+        # own process group, so cancelling takes down whatever make started too
+        return subprocess.Popen(command, shell=True, cwd=self.cwd, bufsize=0,
+                                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                start_new_session=(os.name != "nt"))
+
+    # output goes out in whatever chunks the pipe gives, not line by line,
+    # so a chatty build doesn't turn into one console update per line
+    def pump(self, command: str, process: subprocess.Popen, onText: Callable[[str], None] | None = None):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            data = process.stdout.read(self.READ_SIZE)
+            if (not data):
+                break
+
+            text = decoder.decode(data)
+            if (text):
+                self.onOutput(command, text)
+                if (onText is not None):
+                    onText(text)
+
+        process.stdout.close()
+
+    # the background steps too
+    def cancel(self):
+        with self.processesLock:
+            self.cancelled = True
+            self.cancelAll(self.processes + self.background)
+            self.background = []
+
+    def cancelAll(self, processes: list[subprocess.Popen]):
+        for process in processes:
+            self.stopProcess(process)
+
+        if (processes):
+            timer = Timer(self.KILL_TIMEOUT, lambda: [self.stopProcess(p, kill=True) for p in processes])
+            timer.daemon = True
+            timer.start()
+
+    def stopProcess(self, process: subprocess.Popen, kill: bool = False):
+        try:
+            if (os.name != "nt"):
+                # even if the shell is gone, what it started may not be
+                os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+            elif (process.poll() is None):
+                process.kill() if kill else process.terminate()
+        except OSError:
+            pass
@@ -0,0 +1,96 @@
+import os
+from array import array
+from collections import OrderedDict
+from threading import Lock
+
+from loguru import logger
+
+# a source file, read once. not memory mapped: a file that gets truncated
+# under a mapping (a rebuild) kills us with SIGBUS the next time it's read.
+# the line index is only built when someone asks for lines
+class SourceDocument:
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as sourceFile:
+            stat = os.fstat(sourceFile.fileno())
+            self.mtime = stat.st_mtime_ns
+            self.data = sourceFile.read()
+            self.size = len(self.data)
+
+        self.lineOffsets: array | None = None
+
+    def isCurrent(self, stat: os.stat_result) -> bool:
+        return stat.st_mtime_ns == self.mtime and stat.st_size == self.size
+
+    # where every line starts
+    def offsets(self) -> array:
+        if (self.lineOffsets is None):
+            offsets = array("Q", [0])
+            pos = self.data.find(b"\n")
+            while (0 <= pos < self.size - 1):
+                offsets.append(pos + 1)
+                pos = self.data.find(b"\n", pos + 1)
+            self.lineOffsets = offsets
+
+        return self.lineOffsets
+
+    def lineCount(self) -> int:
+        return len(self.offsets())
+
+    # lines start from 1, like GDB's
+    def lines(self, first: int, last: int) -> str:
+        offsets = self.offsets()
+        first = min(max(first, 1), len(offsets))
+        last = min(max(last, first), len(offsets))
+        end = offsets[last] if last < len(offsets) else self.size
+
+        return self.data[offsets[first - 1]:end].decode(errors="replace")
+
+    def line(self, number: int) -> str:
+        return self.lines(number, number).rstrip("\r\n")
+
+# the source files of the frames we stopped in, most recently used last.
+# a file that changed on disk gets opened again
+class SourceManager:
+    MAX_DOCUMENTS = 32
+
+    def __init__(self):
+        self.documents: OrderedDict[str, SourceDocument] = OrderedDict()
+        self.lock = Lock()
+
+    def open(self, path: str) -> SourceDocument | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self.lock:
+            document = self.documents.get(path)
+            if (document is not None and document.isCurrent(stat)):
+                self.documents.move_to_end(path)
+                return document
+
+            try:
+                document = SourceDocument(path)
+            except OSError as e:
+                logger.warning(f"Couldn't open {path}: {e}")
+                self.documents.pop(path, None)
+                return None
+
+            self.documents[path] = document
+            self.documents.move_to_end(path)
+            while (len(self.documents) > self.MAX_DOCUMENTS):
+                self.documents.popitem(last=False)
+
+            return document
+
+    # GDB's fullname is the absolute path, file is whatever the compiler saw
+    def openFrame(self, fullname: str, file: str = "") -> SourceDocument | None:
+        for path in (fullname, file):
+            if (path):
+                document = self.open(path)
+                if (document is not None):
+                    return document
+
+        return None
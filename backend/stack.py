@@ -0,0 +1,134 @@
+from concurrent.futures import Future
+from threading import Lock
+
+from backend.gdbmi import GdbMI, GdbMIManager
+
+class ThreadStack:
+    __slots__ = ("top", "frames", "complete", "generation")
+
+    def __init__(self, top: tuple, generation: int):
+        # the thread's top frame (address, function) when these got fetched
+        self.top = top
+        # from level 0 down, arguments included
+        self.frames: list[dict] = []
+        # True once GDB gave fewer frames than we asked for
+        self.complete = False
+        self.generation = generation
+
+# call stacks by thread. the top frames come first, deeper ones only when
+# someone scrolls down to them. a stack stays good across stops as long as
+# its thread didn't move (same top frame, and not the one that stopped)
+class StackManager(GdbMIManager):
+    # how many frames get fetched the first time a thread is looked at
+    TOP_FRAMES = 16
+
+    def __init__(self, gdbMI: GdbMI):
+        super().__init__(gdbMI)
+        self.GDBMI_TOKEN = "STK"
+
+        self.stacks: dict[str, ThreadStack] = {}
+        self.stacksLock = Lock()
+        # bumped on every *running/*stopped. stacks of an older one are only
+        # trusted again after checkThreads() saw their thread where it was
+        self.generation = 0
+        # thread id -> top frame, from the last -thread-info
+        self.tops: dict[str, tuple] = {}
+
+        gdbMI.addRecordListener(self.onRecord)
+
+    def onRecord(self, record: dict):
+        if (record.get("type") != "notify"):
+            return
+
+        payload = record.get("payload") or {}
+        with self.stacksLock:
+            if (record.get("message") in ("running", "stopped")):
+                self.generation += 1
+                # whatever reported the stop has moved, even if its pc looks the same
+                if (record.get("message") == "stopped"):
+                    self.stacks.pop(payload.get("thread-id"), None)
+            elif (record.get("message") == "thread-exited"):
+                self.stacks.pop(payload.get("id"), None)
+                self.tops.pop(payload.get("id"), None)
+
+    # thread id -> (address, function) of its top frame, after every stop
+    def checkThreads(self, tops: dict[str, tuple]):
+        with self.stacksLock:
+            self.tops = dict(tops)
+            for thread in list(self.stacks):
+                stack = self.stacks[thread]
+                if (tops.get(thread) == stack.top):
+                    stack.generation = self.generation
+                else:
+                    del self.stacks[thread]
+
+    def listFrames(self, thread: str | None, low: int, high: int, wait: bool = True):
+        threadOption = f"--thread {thread} " if thread else ""
+        return self.sendCmd(f"-stack-list-frames {threadOption}{low} {high}", wait)
+
+    def listArguments(self, thread: str | None, low: int, high: int, wait: bool = True):
+        threadOption = f"--thread {thread} " if thread else ""
+        return self.sendCmd(f"-stack-list-arguments {threadOption}--simple-values {low} {high}", wait)
+
+    def cachedFrames(self, thread: str) -> ThreadStack | None:
+        with self.stacksLock:
+            stack = self.stacks.get(thread)
+            return stack if (stack is not None and stack.generation == self.generation) else None
+
+    # frames [low, high] of a thread (None for the current one), call inside a batch() block
+    def requestFrames(self, thread: str | None, low: int, high: int) -> tuple[int, Future, Future]:
+        with self.stacksLock:
+            generation = self.generation
+
+        return generation, self.listFrames(thread, low, high, wait=False), self.listArguments(thread, low, high, wait=False)
+
+    def collectFrames(self, thread: str, low: int, high: int, request: tuple[int, Future, Future]) -> list[dict]:
+        generation, framesRequest, argumentsRequest = request
+        framesResponse = self.gdbMI.waitFor(framesRequest)
+        argumentsResponse = self.gdbMI.waitFor(argumentsRequest)
+
+        # "No stack." and the like: there's nothing more to get
+        frames = []
+        if (framesResponse.get("message") == "done"):
+            frames = [dict(frame) for frame in framesResponse["payload"].get("stack", [])]
+
+        if (argumentsResponse.get("message") == "done"):
+            arguments = {a.get("level"): a.get("args", []) for a in argumentsResponse["payload"].get("stack-args", [])}
+            for frame in frames:
+                frame["args"] = arguments.get(frame.get("level"), frame.get("args", []))
+
+        with self.stacksLock:
+            # the target ran in the meantime, these may be stale already
+            if (generation != self.generation):
+                return frames
+
+            stack = self.stacks.get(thread)
+            if (stack is None or stack.generation != generation or len(stack.frames) != low):
+                if (low != 0):
+                    return frames
+
+                stack = ThreadStack(self.tops.get(thread), generation)
+                self.stacks[thread] = stack
+
+            stack.frames.extend(frames)
+            stack.complete = len(frames) < high - low + 1
+
+        return frames
+
+    # the first count frames of a thread, from the cache as far as it goes.
+    # the bool is True if there are no more after them
+    def getFrames(self, thread: str, count: int) -> tuple[list[dict], bool]:
+        stack = self.cachedFrames(thread)
+        frames = list(stack.frames) if stack is not None else []
+        complete = stack is not None and stack.complete
+
+        if (len(frames) < count and not complete):
+            low, high = len(frames), count - 1
+            with self.gdbMI.batch():
+                request = self.requestFrames(thread, low, high)
+
+            fetched = self.collectFrames(thread, low, high, request)
+            frames += fetched
+            complete = len(fetched) < high - low + 1
+
+        return frames[:count], complete and len(frames) <= count
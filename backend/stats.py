@@ -0,0 +1,190 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from threading import Lock
+
+# command latencies in buckets, enough for percentiles without keeping
+# every sample around
+class Histogram:
+    # upper bounds in milliseconds, the last bucket takes everything slower
+    BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect_left(self.BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    # upper bound of the bucket the percentile falls in
+    def percentile(self, p: float) -> float:
+        if (self.count == 0):
+            return 0.0
+
+        wanted = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if (seen >= wanted):
+                # never above what was actually seen
+                return round(min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max, 3)
+
+        return round(self.max, 3)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": round(self.max, 3),
+            "buckets": dict(zip([*map(str, self.BOUNDS), "inf"], self.counts))
+        }
+
+# what talking to one GDB costs: latency by command and by manager
+# ("COD", "CPU", ...), commands in flight, bytes, and timeouts.
+# cheap enough to stay on all the time, only the trace is opt-in
+class GdbStats:
+    # trace events kept, the oldest get dropped
+    MAX_TRACE_EVENTS = 100000
+
+    def __init__(self):
+        self.lock = Lock()
+        self.epoch = time.perf_counter()
+        self.tracing = False
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.commands: dict[str, Histogram] = {}
+            self.categories: dict[str, Histogram] = {}
+            # token -> (command name, category, start)
+            self.inFlight: dict[int, tuple[str, str, float]] = {}
+            self.maxInFlight = 0
+            self.bytesRead = 0
+            self.bytesWritten = 0
+            self.writes = 0
+            # by command name and by manager
+            self.timeouts: dict[str, int] = {}
+            self.categoryTimeouts: dict[str, int] = {}
+
+            self.traceEvents: deque[dict] = deque(maxlen=self.MAX_TRACE_EVENTS)
+            # trace viewers want numbers for tracks, manager -> track
+            self.traceTracks: dict[str, int] = {}
+
+    def commandSent(self, token: int, command: str, category: str):
+        name = command.split(maxsplit=1)[0] if command.strip() else command
+        with self.lock:
+            self.inFlight[token] = (name, category or "-", time.perf_counter())
+            self.maxInFlight = max(self.maxInFlight, len(self.inFlight))
+
+    def commandDone(self, token: int, status: str = ""):
+        end = time.perf_counter()
+        with self.lock:
+            sent = self.inFlight.pop(token, None)
+            if (sent is None):
+                return
+
+            name, category, start = sent
+            ms = (end - start) * 1000
+            self.commands.setdefault(name, Histogram()).add(ms)
+            self.categories.setdefault(category, Histogram()).add(ms)
+
+            if (self.tracing):
+                self.traceEvents.append({
+                    "name": name, "cat": category, "ph": "X",
+                    "ts": round((start - self.epoch) * 1e6, 1), "dur": round((end - start) * 1e6, 1),
+                    "pid": os.getpid(), "tid": self.traceTracks.setdefault(category, len(self.traceTracks) + 1),
+                    "args": {"token": token, "status": status}
+                })
+
+    # GDB went away, whatever was in flight isn't coming back
+    def abandonAll(self):
+        with self.lock:
+            self.inFlight.clear()
+
+    def dataWritten(self, count: int):
+        with self.lock:
+            self.bytesWritten += count
+            self.writes += 1
+
+    def dataRead(self, count: int):
+        with self.lock:
+            self.bytesRead += count
+
+    # nobody waits for it anymore, it's counted and no longer in flight
+    def timedOut(self, token: int):
+        with self.lock:
+            sent = self.inFlight.pop(token, None)
+            if (sent is None):
+                return
+
+            name, category, _ = sent
+            self.timeouts[name] = self.timeouts.get(name, 0) + 1
+            self.categoryTimeouts[category] = self.categoryTimeouts.get(category, 0) + 1
+
+    def setTracing(self, enabled: bool):
+        with self.lock:
+            self.tracing = enabled
+
+    def summary(self) -> dict:
+        with self.lock:
+            now = time.perf_counter()
+            return {
+                "commands": {name: h.summary() for name, h in sorted(self.commands.items())},
+                "categories": {name: h.summary() for name, h in sorted(self.categories.items())},
+                "inFlight": len(self.inFlight),
+                "oldestInFlightMs": round(max(((now - s[2]) * 1000 for s in self.inFlight.values()), default=0), 3),
+                "maxInFlight": self.maxInFlight,
+                "bytesRead": self.bytesRead,
+                "bytesWritten": self.bytesWritten,
+                "writes": self.writes,
+                "timeouts": dict(self.timeouts),
+                "categoryTimeouts": dict(self.categoryTimeouts),
+            }
+
+    # the summary as a table, slowest commands (by total time) first
+    def dump(self) -> str:
+        summary = self.summary()
+        lines = [
+            f"in flight: {summary['inFlight']} (max {summary['maxInFlight']}, oldest {summary['oldestInFlightMs']} ms)",
+            f"written: {summary['bytesWritten']} bytes in {summary['writes']} writes, read: {summary['bytesRead']} bytes",
+            f"timeouts: {sum(summary['timeouts'].values())}",
+            ""
+        ]
+
+        for title, table, timedOut in (("manager", summary["categories"], summary["categoryTimeouts"]),
+                                       ("command", summary["commands"], summary["timeouts"])):
+            lines.append(f"{title:<32} {'count':>7} {'mean':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>9}  (ms)")
+            for name, h in sorted(table.items(), key=lambda item: -item[1]["count"] * item[1]["mean"]):
+                timeouts = timedOut.get(name, 0)
+                lines.append(f"{name:<32} {h['count']:>7} {h['mean']:>9} {h['p50']:>8} {h['p90']:>8} {h['p99']:>8} {h['max']:>9}"
+                             + (f"  {timeouts} timed out" if timeouts else ""))
+            lines.append("")
+
+        return "\n".join(lines)
+
+    def exportJSON(self, path: str):
+        with open(path, "w") as statsFile:
+            json.dump(self.summary(), statsFile, indent=2)
+
+    # loads in chrome://tracing or Perfetto, one track per manager
+    def exportTrace(self, path: str):
+        with self.lock:
+            events = list(self.traceEvents)
+            tracks = dict(self.traceTracks)
+
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": track, "args": {"name": category}}
+                 for category, track in tracks.items()]
+        with open(path, "w") as traceFile:
+            json.dump({"traceEvents": names + events, "displayTimeUnit": "ms"}, traceFile)
@@ -1,4 +1,116 @@
-from backend.gdbmi import GdbMI, GdbMIManager
+import json
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future
+from threading import Lock
+
+from loguru import logger
+
+from backend.elf import binaryIdentity, readSymbols
+from backend.gdbmi import GdbMI, GdbMIManager, miQuote
+from misc import misc
+
+# one GDB variable object: GDB keeps the value, and on every stop tells us
+# only which ones changed. children get listed only when asked for
+class VarObject:
+    __slots__ = ("name", "expression", "type", "value", "numChildren", "children", "parent", "inScope")
+
+    def __init__(self, name: str, expression: str, type: str = "", value: str = "", numChildren: int = 0,
+                 parent: "VarObject | None" = None):
+        # GDB's name for it, like "var1" or "var1.field"
+        self.name = name
+        self.expression = expression
+        self.type = type
+        self.value = value
+        self.numChildren = numChildren
+        # None until someone expands it
+        self.children: list[VarObject] | None = None
+        self.parent = parent
+        self.inScope = True
+
+# functions and variables of the program sorted by address, for address to
+# symbol lookups, plus their names sorted for prefix search
+class SymbolIndex:
+    def __init__(self, symbols: list[tuple[int, int, str, str]]):
+        symbols = sorted(symbols)
+
+        self.addresses = array("Q", (s[0] for s in symbols))
+        self.sizes = array("Q", (s[1] for s in symbols))
+        self.names = [s[2] for s in symbols]
+        # "F" for functions, "V" for variables
+        self.kinds = "".join(s[3] for s in symbols)
+
+        self.byName: dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            self.byName.setdefault(name, i)
+
+        order = sorted(range(len(self.names)), key=lambda i: self.names[i].lower())
+        self.searchKeys = [self.names[i].lower() for i in order]
+        self.searchOrder = array("L", order)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def symbol(self, i: int) -> tuple[int, int, str, str]:
+        return self.addresses[i], self.sizes[i], self.names[i], self.kinds[i]
+
+    # (symbol name, offset into it) for an address, None if it's in no symbol
+    def lookup(self, address: int) -> tuple[str, int] | None:
+        i = bisect_right(self.addresses, address) - 1
+        if (i < 0):
+            return None
+
+        offset = address - self.addresses[i]
+        # size 0 is what assembly labels get, they cover up to the next
+        # symbol. the last one has no next symbol, so only its own address
+        size = self.sizes[i] or (1 if i == len(self.addresses) - 1 else 0)
+        if (size and offset >= size):
+            return None
+
+        return self.names[i], offset
+
+    def find(self, name: str) -> tuple[int, int, str, str] | None:
+        i = self.byName.get(name)
+        return self.symbol(i) if i is not None else None
+
+    # names starting with text first, then the ones that have its letters in order
+    def search(self, text: str, limit: int = 50) -> list[tuple[int, int, str, str]]:
+        text = text.lower()
+        found = []
+
+        i = bisect_left(self.searchKeys, text)
+        while (i < len(self.searchKeys) and len(found) < limit and self.searchKeys[i].startswith(text)):
+            found.append(self.searchOrder[i])
+            i += 1
+
+        if (len(found) < limit):
+            fuzzy = re.compile(".*?".join(re.escape(c) for c in text))
+            seen = set(found)
+            for key, index in zip(self.searchKeys, self.searchOrder):
+                if (index not in seen and fuzzy.search(key)):
+                    found.append(index)
+                    if (len(found) >= limit):
+                        break
+
+        return [self.symbol(i) for i in found]
+
+    @staticmethod
+    def load(path: str) -> "SymbolIndex | None":
+        try:
+            with open(path, "r") as cacheFile:
+                return SymbolIndex([tuple(s) for s in json.load(cacheFile)["symbols"]])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path: str):
+        try:
+            with open(path, "w") as cacheFile:
+                json.dump({"symbols": [self.symbol(i) for i in range(len(self))]}, cacheFile)
+        except OSError as e:
+            logger.warning(f"Couldn't save the symbol index: {e}")
 
 class SymbolsManager(GdbMIManager):
 
@@ -6,8 +118,236 @@ class SymbolsManager(GdbMIManager):
         super().__init__(gdbMI)
         self.GDBMI_TOKEN = "SYM"
 
-    def showStackVariables(self):
-        return self.sendCmd("-stack-list-locals --all-values")
+        # the locals of the current function, by expression
+        self.localVars: dict[str, VarObject] = {}
+        # every variable object we made, by GDB name
+        self.varObjects: dict[str, VarObject] = {}
+        self.localsFunction: str | None = None
+
+        # evaluations by (expression, thread, frame, stop generation). asking
+        # again while one is in flight gets the same Future
+        self.evaluations: dict[tuple, Future] = {}
+        self.evaluationsLock = Lock()
+        self.stopGeneration = 0
+
+        self.symbolIndex = SymbolIndex([])
+
+        gdbMI.addRecordListener(self.onRecord)
+
+    def onRecord(self, record: dict):
+        if (record.get("type") == "notify" and record.get("message") in ("running", "stopped", "memory-changed", "thread-selected")):
+            self.invalidateEvaluations()
+
+    # anything that can change what an expression evaluates to should call this
+    def invalidateEvaluations(self):
+        with self.evaluationsLock:
+            self.stopGeneration += 1
+            self.evaluations.clear()
+
+    def getFunctions(self, wait: bool = True):
+        return self.sendCmd("-symbol-info-functions", wait)
+
+    def getGlobalVariables(self, wait: bool = True):
+        return self.sendCmd("-symbol-info-variables", wait)
+
+    # read from the ELF the first time, then from the cache for the same build
+    def loadSymbols(self, programPath: str) -> SymbolIndex:
+        cachePath = os.path.join(misc.cacheDir(), f"symbols-{binaryIdentity(programPath)}.json")
+        index = SymbolIndex.load(cachePath)
+
+        if (index is None):
+            try:
+                symbols = readSymbols(programPath)
+            except (OSError, IndexError, ValueError, struct.error) as e:
+                logger.warning(f"Couldn't read symbols from {programPath}: {e}")
+                symbols = None
+
+            if (symbols is None):
+                symbols = self.symbolsFromGdb()
+
+            index = SymbolIndex(symbols)
+            index.save(cachePath)
+
+        self.symbolIndex = index
+        return index
+
+    # for things that aren't ELFs. GDB only gives addresses for the symbols
+    # without debug info, so those are the only ones we can index
+    def symbolsFromGdb(self) -> list[tuple[int, int, str, str]]:
+        with self.gdbMI.batch():
+            requests = [("F", self.getFunctions(wait=False)), ("V", self.getGlobalVariables(wait=False))]
+
+        symbols = []
+        for kind, request in requests:
+            response = self.gdbMI.waitFor(request)
+            if (response.get("message") != "done"):
+                continue
+
+            for symbol in response["payload"].get("symbols", {}).get("nondebugging", []):
+                symbols.append((int(symbol["address"], 16), 0, symbol["name"], kind))
+
+        return symbols
+
+    def showStackVariables(self, wait: bool = True):
+        return self.sendCmd("-stack-list-locals --all-values", wait)
+
+    def showStackVariableNames(self, wait: bool = True):
+        return self.sendCmd("-stack-list-locals --no-values", wait)
 
     def getVariableValue(self, varName: str):
         return self.sendCmd(f"-data-evaluate-expression {varName}")
+
+    # no thread/frame means the selected ones
+    def evaluate(self, expression: str, thread: str | None = None, frame: int | None = None) -> Future:
+        with self.evaluationsLock:
+            key = (expression, thread, frame, self.stopGeneration)
+            future = self.evaluations.get(key)
+            if (future is None):
+                options = ""
+                if (thread is not None):
+                    options += f"--thread {thread} "
+                if (frame is not None):
+                    options += f"--frame {frame} "
+
+                future = self.sendCmd(f"-data-evaluate-expression {options}{miQuote(expression)}", wait=False)
+                self.evaluations[key] = future
+
+        return future
+
+    # the value as GDB prints it, None if it couldn't be evaluated
+    def getExpressionValue(self, expression: str, thread: str | None = None, frame: int | None = None) -> str | None:
+        response = self.gdbMI.waitFor(self.evaluate(expression, thread, frame))
+        if (response.get("message") != "done"):
+            return None
+
+        return response["payload"].get("value")
+
+    def selectFrame(self, level: int):
+        response = self.sendCmd(f"-stack-select-frame {level}")
+        self.invalidateEvaluations()
+
+        return response
+
+    # floating ("@") variable objects follow whatever frame is selected
+    def createVarObject(self, expression: str, wait: bool = True):
+        return self.sendCmd(f"-var-create - @ {miQuote(expression)}", wait)
+
+    def deleteVarObject(self, name: str, wait: bool = True):
+        return self.sendCmd(f"-var-delete {name}", wait)
+
+    def listVarChildren(self, name: str, wait: bool = True):
+        return self.sendCmd(f"-var-list-children --all-values {name}", wait)
+
+    def updateVarObjects(self, wait: bool = True):
+        return self.sendCmd("-var-update --all-values *", wait)
+
+    def forgetVarObject(self, varObject: VarObject):
+        self.varObjects.pop(varObject.name, None)
+        for child in varObject.children or []:
+            self.forgetVarObject(child)
+
+    # call inside a batch() block
+    def requestLocals(self) -> dict[str, Future]:
+        return {
+            "names": self.showStackVariableNames(wait=False),
+            "update": self.updateVarObjects(wait=False)
+        }
+
+    # applies what changed since the last stop, returns the GDB names of the
+    # variable objects whose value or children changed
+    def collectLocals(self, requests: dict[str, Future], function: str) -> set[str]:
+        namesResponse = self.gdbMI.waitFor(requests["names"])
+        updateResponse = self.gdbMI.waitFor(requests["update"])
+
+        names = []
+        if (namesResponse.get("message") == "done"):
+            # GDB says locals=[name="a",name="b"], which comes out as plain strings
+            names = [local if isinstance(local, str) else local["name"]
+                     for local in namesResponse["payload"].get("locals", [])]
+
+        changed = set()
+        # locals whose variable object GDB can't use anymore (the program
+        # was loaded again, say), they get made again
+        invalid = set()
+        if (updateResponse.get("message") == "done"):
+            for change in updateResponse["payload"].get("changelist", []):
+                varObject = self.varObjects.get(change["name"])
+                if (varObject is None):
+                    continue
+
+                if (change.get("in_scope") == "invalid"):
+                    while (varObject.parent is not None):
+                        varObject = varObject.parent
+                    invalid.add(varObject.expression)
+                    continue
+
+                varObject.value = change.get("value", varObject.value)
+                varObject.inScope = change.get("in_scope", "true") == "true"
+                if (change.get("type_changed") == "true" or "new_num_children" in change):
+                    varObject.type = change.get("new_type", varObject.type)
+                    varObject.numChildren = int(change.get("new_num_children", varObject.numChildren))
+                    for child in varObject.children or []:
+                        self.forgetVarObject(child)
+                    varObject.children = None
+
+                changed.add(varObject.name)
+
+        # a different function has different locals, start over
+        if (function != self.localsFunction):
+            stale = list(self.localVars)
+        else:
+            stale = [n for n in self.localVars if n not in names or n in invalid]
+        self.localsFunction = function
+
+        with self.gdbMI.batch():
+            for expression in stale:
+                varObject = self.localVars.pop(expression)
+                self.forgetVarObject(varObject)
+                self.deleteVarObject(varObject.name, wait=False)
+
+            created = [(name, self.createVarObject(name, wait=False)) for name in names if name not in self.localVars]
+
+        for expression, request in created:
+            response = self.gdbMI.waitFor(request)
+            if (response.get("message") != "done"):
+                logger.debug(f"Can't watch {expression}: {response.get('payload')}")
+                continue
+
+            payload = response["payload"]
+            varObject = VarObject(payload["name"], expression, payload.get("type", ""), payload.get("value", ""),
+                                  int(payload.get("numchild", 0)))
+            self.localVars[expression] = varObject
+            self.varObjects[varObject.name] = varObject
+            changed.add(varObject.name)
+
+        # keep the order GDB lists them in
+        self.localVars = {name: self.localVars[name] for name in names if name in self.localVars}
+
+        return changed
+
+    def refreshLocals(self, function: str) -> set[str]:
+        with self.gdbMI.batch():
+            requests = self.requestLocals()
+
+        return self.collectLocals(requests, function)
+
+    # lists the children of a variable object the first time, afterwards
+    # they're kept up to date by the stop refresh like everything else
+    def expandVarObject(self, name: str) -> list[VarObject]:
+        varObject = self.varObjects[name]
+        if (varObject.children is not None):
+            return varObject.children
+
+        varObject.children = []
+        response = self.listVarChildren(name)
+        if (response.get("message") != "done"):
+            logger.debug(f"Can't expand {varObject.expression}: {response.get('payload')}")
+            return varObject.children
+
+        for child in response["payload"].get("children", []):
+            childObject = VarObject(child["name"], child.get("exp", ""), child.get("type", ""), child.get("value", ""),
+                                    int(child.get("numchild", 0)), varObject)
+            varObject.children.append(childObject)
+            self.varObjects[childObject.name] = childObject
+
+        return varObject.children
@@ -3,6 +3,9 @@ import sys
 
 from PySide6.QtWidgets import QApplication
 
+from backend.gdbmi import GdbMI
+from ui import observer
+from ui.gdb_worker import GdbWorker
 from ui.launcher.launcher_controller import LauncherController
 from ui.launcher.launcher_view import LauncherView
 from ui.main_controller import SGDBController
@@ -19,6 +22,8 @@ if __name__ == "__main__":
     parsedArgs = ourParser.parse_args()
 
     app = QApplication()
+    # here, on the GUI thread, before GDB's and the pre-run commands' threads can need it
+    observer.startGuiDispatcher()
     mainWindow = MainView(APPLICATION_TITLE)
     launcherView = LauncherView(mainWindow.mdiArea)
     launcherView.setGeometry(int((mainWindow.width() - 600) / 2),
@@ -28,4 +33,12 @@ if __name__ == "__main__":
     launcherController = LauncherController(launcherView)
     sgdbController = SGDBController(mainWindow)
     mainWindow.show()
-    sys.exit(app.exec())
+
+    if (parsedArgs.config):
+        # the launcher stays up if it can't be opened
+        launcherController.openPath(parsedArgs.config[0])
+
+    status = app.exec()
+    # GDBs still quitting get a moment, then they're killed
+    GdbWorker.waitForStopped(GdbMI.QUIT_TIMEOUT + 1)
+    sys.exit(status)
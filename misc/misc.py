@@ -2,3 +2,11 @@ import os
 
 def clearscreen():
     os.system("cls" if os.name == "nt" else "clear")
+
+# where SideGDB keeps files that can always be rebuilt
+def cacheDir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "sidegdb")
+    os.makedirs(path, exist_ok=True)
+
+    return path
@@ -0,0 +1,297 @@
+# benchmarks for the GDB side of SideGDB, against tools/fake_gdb.py so they
+# run anywhere and give the same numbers for the same code. from the repo root:
+#
+#   python -m tools.bench --output before.json
+#   python -m tools.bench --compare before.json
+#
+# the fake GDB answers instantly unless told otherwise (--latency), so by
+# default this measures our own overhead: parsing, bookkeeping, caches
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from threading import Event
+
+from loguru import logger
+
+from backend.gdbmi import GdbMI
+from tools.fake_gdb import PROGRAM_BASE, writeProgram
+from ui.model import SGDBModel
+
+FAKE_GDB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_gdb.py")
+
+# fake_gdb.py options the benchmarks pass through
+FAKE_OPTIONS = ("latency", "jitter", "threads", "frames", "locals", "registers", "console_lines", "transcript")
+
+def fakeCommand(options: argparse.Namespace) -> list[str]:
+    command = [sys.executable, FAKE_GDB, "--interpreter=mi2"]
+    for name in FAKE_OPTIONS:
+        value = getattr(options, name)
+        if (value is not None):
+            command += [f"--{name.replace('_', '-')}", str(value)]
+
+    return command
+
+def startGdb(options: argparse.Namespace) -> GdbMI:
+    return GdbMI([], command=fakeCommand(options))
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+# name -> (value, unit, True if higher is better)
+Results = dict[str, tuple[float, str, bool]]
+
+def benchRoundTrip(options: argparse.Namespace) -> Results:
+    gdbMI = startGdb(options)
+    commands = options.commands
+    try:
+        # one write and one wait per command
+        def sequential():
+            for n in range(commands):
+                gdbMI.sendCmd(f"-data-evaluate-expression {n}")
+
+        # all of them in one write, then wait for the answers
+        def batched():
+            with gdbMI.batch():
+                requests = [gdbMI.sendCmdAsync(f"-data-evaluate-expression {n}") for n in range(commands)]
+            for request in requests:
+                gdbMI.waitFor(request)
+
+        return {
+            "roundtrip.sequential": (commands / timed(sequential), "cmd/s", True),
+            "roundtrip.batched": (commands / timed(batched), "cmd/s", True),
+        }
+    finally:
+        gdbMI.quit()
+
+def benchStop(options: argparse.Namespace) -> Results:
+    gdbMI = startGdb(options)
+    model = SGDBModel(gdbMI)
+
+    stopped = Event()
+    stops = []
+    def onRecord(record: dict):
+        if (record.get("type") == "notify" and record.get("message") == "stopped"):
+            stops.append(record.get("payload") or {})
+            stopped.set()
+    gdbMI.addRecordListener(onRecord)
+
+    def step() -> int | None:
+        stopped.clear()
+        model.codeMgr.stepOver()
+        if (not stopped.wait(gdbMI.RESPONSE_TIMEOUT)):
+            raise TimeoutError("the fake GDB never stopped")
+
+        address = stops[-1].get("frame", {}).get("addr")
+        return int(address, 16) if address else None
+
+    try:
+        # the first one loads register names, breakpoints, every thread
+        first = timed(model.refreshOnStop, step())
+
+        times = []
+        for _ in range(options.stops):
+            pc = step()
+            times.append(timed(model.refreshOnStop, pc))
+        times.sort()
+
+        return {
+            "stop.first": (first * 1000, "ms", False),
+            "stop.median": (statistics.median(times) * 1000, "ms", False),
+            "stop.p90": (times[int(len(times) * 0.9)] * 1000, "ms", False),
+        }
+    finally:
+        gdbMI.quit()
+
+def benchMemory(options: argparse.Namespace) -> Results:
+    gdbMI = startGdb(options)
+    model = SGDBModel(gdbMI)
+    size = options.memory * 1024
+    address = 0x10000
+
+    try:
+        def cold():
+            model.memMgr.invalidate()
+            data = model.memMgr.readBytes(address, size)
+            if (len(data) != size):
+                raise RuntimeError(f"read {len(data)} bytes of {size}")
+
+        coldTime = timed(cold)
+        warmTime = timed(model.memMgr.readBytes, address, size)
+
+        return {
+            "memory.cold": (size / coldTime / 1e6, "MB/s", True),
+            "memory.warm": (size / warmTime / 1e6, "MB/s", True),
+        }
+    finally:
+        gdbMI.quit()
+
+def benchDisassembly(options: argparse.Namespace) -> Results:
+    gdbMI = startGdb(options)
+    model = SGDBModel(gdbMI)
+    size = options.disassembly * 1024
+    address = PROGRAM_BASE
+
+    try:
+        # only the program's code gets cached
+        with tempfile.TemporaryDirectory() as directory:
+            program = os.path.join(directory, "program")
+            writeProgram(program, size)
+            model.loadProgram(program)
+
+        def cold() -> int:
+            model.codeMgr.invalidateDisassembly()
+            return len(model.codeMgr.disassembleCached(address, size))
+
+        start = time.perf_counter()
+        instructions = cold()
+        coldTime = time.perf_counter() - start
+        warmTime = timed(model.codeMgr.disassembleCached, address, size)
+
+        return {
+            "disassembly.cold": (instructions / coldTime, "insn/s", True),
+            "disassembly.warm": (instructions / warmTime, "insn/s", True),
+        }
+    finally:
+        gdbMI.quit()
+
+BENCHMARKS = {
+    "roundtrip": benchRoundTrip,
+    "stop": benchStop,
+    "memory": benchMemory,
+    "disassembly": benchDisassembly,
+}
+
+# every benchmark runs `repeat` times in a fresh GDB, the median counts
+def runBenchmarks(options: argparse.Namespace) -> Results:
+    results: Results = {}
+    for name, benchmark in BENCHMARKS.items():
+        if (options.only and name not in options.only):
+            continue
+
+        runs: dict[str, list[float]] = {}
+        units = {}
+        for _ in range(options.repeat):
+            for result, (value, unit, higherIsBetter) in benchmark(options).items():
+                runs.setdefault(result, []).append(value)
+                units[result] = (unit, higherIsBetter)
+
+        for result, values in runs.items():
+            unit, higherIsBetter = units[result]
+            results[result] = (statistics.median(values), unit, higherIsBetter)
+            print(f"{result:<24} {results[result][0]:>14.3f} {unit}", flush=True)
+
+    return results
+
+def gitCommit() -> tuple[str, bool]:
+    root = os.path.dirname(os.path.dirname(FAKE_GDB))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True)
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "", False
+
+    return commit.stdout.strip(), bool(status.stdout.strip())
+
+def saveResults(path: str, options: argparse.Namespace, results: Results):
+    commit, dirty = gitCommit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {name: value for name, value in vars(options).items() if name not in ("output", "compare")},
+        "results": {name: {"value": value, "unit": unit, "higherIsBetter": higherIsBetter}
+                    for name, (value, unit, higherIsBetter) in results.items()},
+    }
+
+    with open(path, "w") as resultsFile:
+        json.dump(report, resultsFile, indent=2)
+
+# prints both runs side by side, returns how many results got worse by
+# more than threshold percent
+def compareResults(path: str, results: Results, threshold: float) -> int:
+    with open(path) as resultsFile:
+        base = json.load(resultsFile)
+
+    print(f"\ncompared to {base.get('commit', '')[:12] or path}{' (dirty)' if base.get('dirty') else ''}")
+    print(f"{'':<24} {'base':>14} {'now':>14} {'change':>9}")
+
+    regressions = 0
+    for name, (value, unit, higherIsBetter) in results.items():
+        before = base.get("results", {}).get(name)
+        if (before is None or not before["value"]):
+            print(f"{name:<24} {'-':>14} {value:>14.3f}")
+            continue
+
+        change = (value - before["value"]) / before["value"] * 100
+        worse = -change if higherIsBetter else change
+        mark = ""
+        if (worse > threshold):
+            mark = "  worse"
+            regressions += 1
+        elif (-worse > threshold):
+            mark = "  better"
+
+        print(f"{name:<24} {before['value']:>14.3f} {value:>14.3f} {change:>+8.1f}%{mark}")
+
+    return regressions
+
+def parseArgs(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SideGDB backend benchmarks, against a fake GDB")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run only these")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the median counts")
+    parser.add_argument("--output", help="write the results here as JSON")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent a result can get worse by before --compare fails")
+
+    parser.add_argument("--commands", type=int, default=2000, help="commands per round-trip run")
+    parser.add_argument("--stops", type=int, default=50, help="stops per stop refresh run")
+    parser.add_argument("--memory", type=int, default=1024, help="KiB read per memory run")
+    parser.add_argument("--disassembly", type=int, default=64, help="KiB disassembled per disassembly run")
+
+    fake = parser.add_argument_group("fake GDB")
+    fake.add_argument("--latency", type=float, help="milliseconds before every reply")
+    fake.add_argument("--jitter", type=float, help="up to this many more milliseconds, at random")
+    fake.add_argument("--threads", type=int)
+    fake.add_argument("--frames", type=int)
+    fake.add_argument("--locals", type=int)
+    fake.add_argument("--registers", type=int)
+    fake.add_argument("--console-lines", type=int, help="target output lines on every step")
+    fake.add_argument("--transcript", help="replay a transcript recorded with fake_gdb.py --record")
+
+    return parser.parse_args(argv)
+
+def main(argv: list[str]) -> int:
+    options = parseArgs(argv)
+
+    # the managers log every command at debug level
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    # the disassembly and symbol caches stay out of the user's
+    with tempfile.TemporaryDirectory() as cacheHome:
+        os.environ["XDG_CACHE_HOME"] = cacheHome
+        results = runBenchmarks(options)
+
+    if (options.output):
+        saveResults(options.output, options, results)
+
+    if (options.compare):
+        return 1 if compareResults(options.compare, results, options.threshold) else 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,338 @@
+# behaviour checks for the backend pieces the benchmarks lean on, so a
+# faster number can't come from a wrong answer. against tools/fake_gdb.py,
+# from the repo root:
+#
+#   python -m tools.checks
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from threading import Event
+
+from loguru import logger
+
+from backend.code import DisassemblyCache
+from backend.elf import binaryIdentity
+from backend.gdbmi import GdbMI, MIStreamParser
+from backend.prerun import PreRunExecutor
+from backend.symbols import SymbolIndex
+from misc import misc
+from tools.fake_gdb import MEMORY_PATTERN, PROGRAM_BASE, UNMAPPED, writeProgram
+from tools.bench import FAKE_GDB
+from ui.gdb_worker import GdbWorker
+from ui.model import SGDBModel
+from ui.session import Session
+
+class CheckFailed(Exception):
+    pass
+
+def expect(condition: bool, message: str):
+    if (not condition):
+        raise CheckFailed(message)
+
+FAKE_COMMAND = [sys.executable, FAKE_GDB, "--interpreter=mi2"]
+
+def startGdb() -> GdbMI:
+    return GdbMI([], command=FAKE_COMMAND)
+
+# the fake program's binary, with size bytes of code
+def programPath(directory: str, size: int = 0x1000) -> str:
+    path = os.path.join(directory, "program")
+    writeProgram(path, size)
+    return path
+
+def patternBytes(address: int, count: int) -> bytes:
+    start = address % len(MEMORY_PATTERN)
+    return (MEMORY_PATTERN * ((start + count) // len(MEMORY_PATTERN) + 1))[start:start + count]
+
+# the same records whatever the pipe hands us at a time
+def checkStreamParser():
+    script = "".join(f"{n}{command}\n" for n, command in enumerate([
+        "-thread-info", "-data-read-memory-bytes 0x1000 5000", "-exec-next", "-stack-list-locals --no-values",
+        "-data-disassemble -s $pc -e $pc+64", "-bogus", "-gdb-exit"], 1))
+    output = subprocess.run([sys.executable, FAKE_GDB, "--console-lines", "3"], input=script.encode(),
+                            capture_output=True, check=True).stdout
+    # GDB on Windows ends lines with \r\n
+    output = output.replace(b"\n", b"\r\n")
+
+    whole = list(MIStreamParser().feed(output))
+    expect(len(whole) == 13, f"expected 13 records, got {len(whole)}")
+    expect([r["token"] for r in whole if r["type"] == "result"] == list(range(1, 8)), "result tokens out of order")
+
+    chunks = random.Random(1)
+    for size in (1, 2, 7, 4096, None):
+        parser = MIStreamParser()
+        records = []
+        position = 0
+        while position < len(output):
+            step = size or chunks.randint(1, 300)
+            records.extend(parser.feed(output[position:position + step]))
+            position += step
+
+        expect(records == whole, f"fed {size or 'random'} bytes at a time, the records differ")
+        expect(not parser.buffer, "bytes left over after the last newline")
+
+def checkDisassemblyCache():
+    cache = DisassemblyCache()
+    expect(cache.gaps(0x10, 0x30) == [(0x10, 0x30)], "an empty cache has everything missing")
+
+    cache.add(0x20, 0x30, [{"address": hex(a)} for a in range(0x20, 0x30, 4)])
+    expect(cache.gaps(0x10, 0x40) == [(0x10, 0x20), (0x30, 0x40)], "gaps around one range")
+    expect(cache.gaps(0x20, 0x30) == [], "no gap inside a range")
+    expect(cache.gaps(0x24, 0x28) == [], "no gap inside part of a range")
+
+    cache.add(0x40, 0x50, [{"address": hex(a)} for a in range(0x40, 0x50, 4)])
+    expect(cache.ranges == [[0x20, 0x30], [0x40, 0x50]], "separate ranges stay separate")
+    expect(cache.gaps(0x28, 0x48) == [(0x30, 0x40)], "gap between two ranges")
+
+    # touching both: one range
+    cache.add(0x30, 0x40, [{"address": hex(a)} for a in range(0x30, 0x40, 4)])
+    expect(cache.ranges == [[0x20, 0x50]], f"ranges didn't merge: {cache.ranges}")
+
+    # overlapping ones grow it without duplicating instructions
+    cache.add(0x10, 0x24, [{"address": hex(a)} for a in range(0x10, 0x24, 4)])
+    expect(cache.ranges == [[0x10, 0x50]], f"overlap didn't merge: {cache.ranges}")
+    expect([int(i["address"], 16) for i in cache.get(0, 0x100)] == list(range(0x10, 0x50, 4)),
+           "instructions missing, repeated or out of order")
+
+    # written over: that part and the instructions running into it go
+    cache.discard(0x30, 0x34)
+    expect(cache.ranges == [[0x10, 0x21], [0x34, 0x50]], f"discard left {cache.ranges}")
+    expect(cache.gaps(0x10, 0x50) == [(0x21, 0x34)], "discarded code still cached")
+    expect(0x30 not in cache.instructions and 0x24 not in cache.instructions, "discarded instructions still there")
+
+    # through the manager: windows in any order give what one big read gives
+    gdbMI = startGdb()
+    try:
+        model = SGDBModel(gdbMI)
+        with tempfile.TemporaryDirectory() as directory:
+            model.loadProgram(programPath(directory))
+
+        for start, size in ((0x401100, 0x40), (0x401000, 0x20), (0x401010, 0x100), (0x401002, 0x200)):
+            model.codeMgr.disassembleCached(start, size)
+
+        cached = model.codeMgr.disassembleCached(0x401000, 0x200)
+        model.codeMgr.invalidateDisassembly()
+        fresh = model.codeMgr.disassembleCached(0x401000, 0x200)
+        expect([i["address"] for i in cached] == [i["address"] for i in fresh],
+               "cached disassembly differs from a fresh one")
+
+        # only the program's code gets cached: firmware or a bootloader can be anywhere else
+        model.codeMgr.disassembleCached(0x7c00, 0x40)
+        model.codeMgr.disassembleCached(PROGRAM_BASE + 0x1000 - 0x20, 0x40)
+        expect(model.codeMgr.disassemblyCache.ranges == [[0x401000, 0x401200]],
+               f"cached outside the code sections: {model.codeMgr.disassemblyCache.ranges}")
+
+        # GDB says the code changed, or we changed it
+        model.codeMgr.onRecord({"type": "notify", "message": "memory-changed",
+                                "payload": {"thread-group": "i1", "addr": "0x401100", "len": "0x4"}})
+        expect(model.codeMgr.disassemblyCache.gaps(0x401000, 0x401200) == [(0x4010f1, 0x401104)],
+               "=memory-changed didn't invalidate the disassembly")
+        model.memMgr.writeMemory(0x401000, b"\x90")
+        expect(model.codeMgr.disassemblyCache.gaps(0x401000, 0x401004) == [(0x401000, 0x401001)],
+               "a memory write didn't invalidate the disassembly")
+    finally:
+        gdbMI.quit()
+
+# the disassembly of the program outlives GDB, through the worker the way a
+# target stops
+def checkDisassemblySaved():
+    with tempfile.TemporaryDirectory() as directory:
+        program = programPath(directory)
+        worker = GdbWorker([], command=FAKE_COMMAND)
+        worker.start()
+
+        deadline = time.monotonic() + GdbMI.RESPONSE_TIMEOUT
+        while (worker.model is None and worker.isRunning() and time.monotonic() < deadline):
+            time.sleep(0.01)
+        expect(worker.model is not None, "the worker never started GDB")
+
+        model = worker.model
+        # stop() drops whatever is still queued
+        ran = Event()
+        worker.call(model.loadProgram, program)
+        worker.call(model.codeMgr.disassembleCached, PROGRAM_BASE, 0x40)
+        worker.call(ran.set)
+        expect(ran.wait(GdbMI.RESPONSE_TIMEOUT), "the worker never ran the jobs")
+
+        worker.stop(model.saveCaches)
+        expect(worker.wait((GdbMI.QUIT_TIMEOUT + 1) * 1000), "the worker didn't stop")
+
+        path = os.path.join(misc.cacheDir(), f"disassembly-{binaryIdentity(program)}.json")
+        expect(os.path.exists(path), "no disassembly cache written on quit")
+
+        # and the next session starts with it
+        gdbMI = startGdb()
+        try:
+            model = SGDBModel(gdbMI)
+            model.loadProgram(program)
+            expect(model.codeMgr.disassemblyCache.gaps(PROGRAM_BASE, PROGRAM_BASE + 0x40) == [],
+                   "the saved disassembly didn't load")
+        finally:
+            gdbMI.quit()
+
+def checkReadBytes():
+    gdbMI = startGdb()
+    try:
+        memory = SGDBModel(gdbMI).memMgr
+        reads = random.Random(2)
+        for _ in range(200):
+            address = reads.randrange(0x10000, 0x80000)
+            count = reads.choice([1, 7, memory.PAGE_SIZE - 1, memory.PAGE_SIZE, reads.randrange(1, 5 * memory.PAGE_SIZE)])
+            expect(memory.readBytes(address, count) == patternBytes(address, count),
+                   f"wrong bytes reading {count} at {hex(address)}")
+
+        # from the cache this time
+        expect(memory.readBytes(0x10001, 3 * memory.PAGE_SIZE) == patternBytes(0x10001, 3 * memory.PAGE_SIZE),
+               "wrong bytes from the cache")
+
+        # stops at the first byte GDB can't read
+        expect(memory.readBytes(UNMAPPED - 10, 100) == patternBytes(UNMAPPED - 10, 10),
+               "a read running into unmapped memory didn't stop there")
+        expect(memory.readBytes(UNMAPPED + 10, 100) == b"", "unmapped memory read as something")
+        expect(memory.readBytes(0x10000, 0) == b"", "zero bytes read as something")
+    finally:
+        gdbMI.quit()
+
+def checkSymbolLookup():
+    index = SymbolIndex([(0x1000, 0x10, "first", "F"), (0x1100, 0x20, "second", "F"),
+                         (0x1200, 0, "label", "F"), (0x1300, 8, "variable", "V"), (0x1400, 0, "end", "F")])
+
+    expect(index.lookup(0xfff) is None, "address before every symbol")
+    expect(index.lookup(0x1000) == ("first", 0), "start of a symbol")
+    expect(index.lookup(0x100f) == ("first", 0xf), "last byte of a symbol")
+    expect(index.lookup(0x1010) is None, "past the end of a symbol")
+    expect(index.lookup(0x1250) == ("label", 0x50), "a label covers up to the next symbol")
+    expect(index.lookup(0x1307) == ("variable", 7), "last byte of a variable")
+    expect(index.lookup(0x1308) is None, "past the end of a variable")
+    expect(index.lookup(0x1400) == ("end", 0), "a label at the very end")
+    expect(index.lookup(0x1500) is None, "a label at the very end covers everything after it")
+
+    # half written by a rebuild
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "truncated")
+        with open(sys.executable, "rb") as elf, open(path, "wb") as truncated:
+            truncated.write(elf.read(200))
+
+        expect(bool(binaryIdentity(path)), "no identity for a truncated ELF")
+
+# the stop refresh, with locals in GDB's own shapes
+def checkStopRefresh():
+    gdbMI = startGdb()
+    try:
+        model = SGDBModel(gdbMI)
+        model.watches = ["l0", "nope"]
+        model.codeMgr.stepOver()
+        snapshot = model.refreshOnStop()
+        expect([v.name for v in snapshot.variables] == [f"l{n}" for n in range(7)] + ["s"],
+               f"wrong locals: {[v.name for v in snapshot.variables]}")
+        expect(len(snapshot.stack) == model.stackMgr.TOP_FRAMES, "wrong number of frames")
+        expect(len(snapshot.threads.threads) == 4, "wrong number of threads")
+        expect(snapshot.watches == (("l0", "1"), ("nope", None)), f"wrong watches: {snapshot.watches}")
+
+        # loading the program again makes GDB's variable objects invalid, they get made again
+        before = {v.name: v.varObject for v in snapshot.variables}
+        model.codeMgr.loadExecutable("/tmp/fake/program")
+        model.codeMgr.stepOver()
+        snapshot = model.refreshOnStop()
+        after = {v.name: v.varObject for v in snapshot.variables}
+        expect(list(after) == list(before), f"wrong locals after a reload: {list(after)}")
+        expect(not set(after.values()) & set(before.values()), "invalid variable objects kept")
+        expect(next(v.value for v in snapshot.variables if v.name == "l0") == "2", "stale value after a reload")
+    finally:
+        gdbMI.quit()
+
+# what a saved session keeps of its breakpoints, attached or not
+def checkSessionBreakpoints():
+    gdbMI = startGdb()
+    try:
+        model = SGDBModel(gdbMI)
+        # one GDB can't find yet, one it refuses outright
+        session = Session(breakpoints=["func_1", "later_module_init", "*0x401010", "*nowhere+"])
+
+        # before attaching (still building, or the build failed) it keeps them all
+        expect(model.sessionBreakpoints(session.breakpoints) == session.breakpoints,
+               "breakpoints lost before the session was attached")
+
+        model.attachSession(session)
+        expect(model.sessionBreakpoints(session.breakpoints) == session.breakpoints,
+               f"breakpoints lost after attaching: {model.sessionBreakpoints(session.breakpoints)}")
+        expect(model.rejectedBreakpoints == ["*nowhere+"], f"wrong refused breakpoints: {model.rejectedBreakpoints}")
+    finally:
+        gdbMI.quit()
+
+def pythonCommand(script: str) -> str:
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(script)}"
+
+# a step that never exits (QEMU waiting for GDB) doesn't hold up the ones
+# after it, and stops with the executor
+def checkPreRunBackground():
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+
+    waiting = pythonCommand("import time; print('Waiting for gdb', flush=True); time.sleep(60)")
+    listening = pythonCommand(f"import socket, time; time.sleep(0.3); s = socket.socket(); "
+                              f"s.bind(('localhost', {port})); s.listen(); time.sleep(60)")
+    steps = [pythonCommand("print('built')"),
+             {"command": waiting, "background": True, "waitForOutput": "Waiting for gdb"},
+             {"command": listening, "background": True, "waitForPort": port},
+             pythonCommand("print('after')")]
+
+    output = []
+    executor = PreRunExecutor(steps, lambda command, text: output.append(text))
+    try:
+        expect(executor.start().result(timeout=10), f"background steps didn't get ready: {''.join(output)}")
+        expect(any("after" in text for text in output), "the step after the background ones didn't run")
+        expect(all(process.poll() is None for process in executor.background), "a background step isn't running")
+    finally:
+        processes = list(executor.background)
+        executor.cancel()
+
+    for process in processes:
+        try:
+            process.wait(executor.KILL_TIMEOUT + 1)
+        except subprocess.TimeoutExpired:
+            raise CheckFailed("a background step outlived the cancel")
+
+    # one that's gone before it got ready is a failed step
+    executor = PreRunExecutor([{"command": pythonCommand("pass"), "background": True, "waitForOutput": "never"},
+                               pythonCommand("print('after')")], lambda command, text: None)
+    expect(executor.start().result(timeout=10) is False, "a background step that exited early counted as ready")
+
+CHECKS = {
+    "stream parser": checkStreamParser,
+    "disassembly cache": checkDisassemblyCache,
+    "disassembly saved": checkDisassemblySaved,
+    "memory reads": checkReadBytes,
+    "symbol lookup": checkSymbolLookup,
+    "stop refresh": checkStopRefresh,
+    "session breakpoints": checkSessionBreakpoints,
+    "pre-run background": checkPreRunBackground,
+}
+
+def main() -> int:
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as cacheHome:
+        os.environ["XDG_CACHE_HOME"] = cacheHome
+        for name, check in CHECKS.items():
+            try:
+                check()
+            except Exception as e:
+                failed += 1
+                print(f"FAIL {name}: {e}")
+                continue
+
+            print(f"ok   {name}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
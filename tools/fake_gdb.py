@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+# a stand-in for `gdb --interpreter=mi2`, for benchmarks and for trying the
+# UI without a target. it simulates a small stopped program (threads, a deep
+# stack, registers, locals, memory, code) or replays a transcript recorded
+# from a real GDB, with as much latency and output as you ask for.
+#
+#   fake_gdb.py [--latency MS] [--threads N] [--frames N] ... [program]
+#   fake_gdb.py --transcript session.jsonl
+#   fake_gdb.py --record session.jsonl -- gdb --interpreter=mi2 program
+#
+# only the standard library, so it runs wherever Python does
+import argparse
+import json
+import random
+import re
+import shlex
+import struct
+import subprocess
+import sys
+import time
+from collections import deque
+from itertools import count
+from threading import Lock, Thread
+
+REGISTER_NAMES = ["rax", "rbx", "rcx", "rdx", "rsi", "rdi", "rbp", "rsp",
+                  "r8", "r9", "r10", "r11", "r12", "r13", "r14", "r15",
+                  "rip", "eflags", "cs", "ss", "ds", "es", "fs", "gs"]
+
+INSTRUCTIONS = ["push   %rbp", "mov    %rsp,%rbp", "sub    $0x20,%rsp", "mov    %edi,-0x14(%rbp)",
+                "add    $0x1,%eax", "cmp    %eax,%edx", "jne    0x401020 <func_0+32>", "call   0x401200 <func_1>"]
+
+EXEC_COMMANDS = ("-exec-continue", "-exec-next", "-exec-step", "-exec-finish",
+                 "-exec-next-instruction", "-exec-step-instruction", "-exec-run", "-exec-interrupt")
+
+# the do-nothing commands GDB says ^done to
+QUIET_COMMANDS = ("-gdb-set", "-environment-cd", "-environment-directory",
+                  "-file-exec-file", "-file-symbol-file", "-interpreter-exec", "-enable-pretty-printing",
+                  "-inferior-tty-set", "-target-select", "-target-disconnect", "-stack-select-frame",
+                  "-break-enable", "-break-disable", "-break-condition", "-data-write-memory-bytes")
+
+# memory below this reads fine, everything above is unmapped
+UNMAPPED = 0xffff_0000_0000_0000
+# every byte depends on its address, so cached and fresh reads can be compared
+MEMORY_PATTERN = bytes((a * 131 + 17) & 0xff for a in range(256))
+
+PROGRAM_BASE = 0x401000
+FUNCTION_SIZE = 0x200
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+SHT_NOBITS = 8
+
+# a token in front of an MI record
+RECORD_RE = re.compile(r"^(\d*)([\^*=+~@&])(.*)$")
+
+# MI output is C-like strings, tuples {a="b"} and lists [..]. a list of
+# (name, value) pairs comes out as [name={..},name={..}] like GDB's
+class Raw(str):
+    pass
+
+def miString(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+def miValue(value) -> str:
+    if (isinstance(value, Raw)):
+        return value
+    if (isinstance(value, dict)):
+        return "{" + ",".join(f"{key}={miValue(item)}" for key, item in value.items()) + "}"
+    if (isinstance(value, list)):
+        return "[" + ",".join(f"{item[0]}={miValue(item[1])}" if isinstance(item, tuple) else miValue(item)
+                              for item in value) + "]"
+
+    return miString(str(value))
+
+def miResults(results: dict) -> str:
+    return ",".join(f"{key}={miValue(value)}" for key, value in results.items())
+
+# integers, $pc and + - between them, which is all the managers send
+def evaluate(expression: str, pc: int) -> int:
+    expression = expression.replace("$pc", str(pc)).replace(" ", "")
+    terms = re.findall(r"([+-]?)(\w+)", expression)
+    if (not terms or "".join(sign + term for sign, term in terms) != expression):
+        raise ValueError(f"No symbol \"{expression}\" in current context.")
+
+    return sum(int(term, 0) * (-1 if sign == "-" else 1) for sign, term in terms)
+
+# a stand-in for the program this pretends to debug, for whatever reads the
+# binary itself: a 64-bit ELF with one code section of size bytes where the
+# fake program is, and nothing in it
+def writeProgram(path: str, size: int):
+    header = b"\x7fELF" + bytes([2, 1, 1]) + bytes(9)
+    # type, machine (x86-64), version, entry, phoff, shoff, flags, ehsize, phentsize, phnum, shentsize, shnum, shstrndx
+    header += struct.pack("<HHIQQQIHHHHHH", 2, 62, 1, PROGRAM_BASE, 0, 64, 0, 64, 0, 0, 64, 2, 0)
+    # the null section, then the code
+    sections = bytes(64) + struct.pack("<IIQQQQIIQQ", 0, SHT_NOBITS, SHF_ALLOC | SHF_EXECINSTR,
+                                       PROGRAM_BASE, 0, size, 0, 0, 16, 0)
+
+    with open(path, "wb") as program:
+        program.write(header + sections)
+
+class MIError(Exception):
+    pass
+
+# a program stopped somewhere in func_0 of thread 1, with other threads
+# parked elsewhere. every step moves pc and changes a couple of registers
+# and locals
+class FakeTarget:
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.pc = PROGRAM_BASE
+        self.stops = 0
+
+        names = REGISTER_NAMES[:options.registers]
+        names += [f"r{n}" for n in range(len(names), options.registers)]
+        self.registerNames = names
+        self.registers = [n * 0x10 for n in range(len(names))]
+        self.changedRegisters: list[int] = []
+
+        self.localNames = [f"l{n}" for n in range(max(options.locals - 1, 0))] + (["s"] if options.locals else [])
+
+        # variable object name -> expression, and the stop they were last updated at
+        self.varObjects: dict[str, str] = {}
+        self.varUpdated = 0
+        # the ones a new program made invalid, reported once by the next -var-update
+        self.varInvalid: set[str] = set()
+        self.varNumbers = count(1)
+
+        self.breakpoints: dict[int, dict] = {}
+        self.breakpointNumbers = count(1)
+
+    def registerIndex(self, name: str) -> int | None:
+        return self.registerNames.index(name) if name in self.registerNames else None
+
+    def frame(self, thread: int, level: int) -> dict:
+        if (level == 0):
+            address = self.pc if thread == 1 else PROGRAM_BASE + thread * FUNCTION_SIZE + 0x10
+        else:
+            address = PROGRAM_BASE + level * FUNCTION_SIZE + 0x24
+
+        function = (address - PROGRAM_BASE) // FUNCTION_SIZE
+        return {"level": str(level), "addr": hex(address), "func": f"func_{function}", "file": "fake.c",
+                "fullname": "/tmp/fake/fake.c", "line": str(10 + function * 20 + (address % FUNCTION_SIZE) // 4),
+                "arch": "i386:x86-64"}
+
+    def depth(self, thread: int) -> int:
+        return self.options.frames if thread == 1 else min(self.options.frames, 4)
+
+    def localValue(self, expression: str) -> str:
+        if (expression == "l0"):
+            return str(self.stops)
+        if (expression == "s"):
+            return "{...}"
+        if (expression.startswith("s.")):
+            return str(self.stops if expression == "s.a" else ord(expression[-1]))
+
+        return expression[1:]
+
+    def localType(self, expression: str) -> str:
+        return "struct pair" if expression == "s" else "int"
+
+    def step(self, command: str) -> dict:
+        self.stops += 1
+        self.pc += 0x20 if command == "-exec-continue" else 4
+        if (self.pc >= PROGRAM_BASE + FUNCTION_SIZE):
+            self.pc = PROGRAM_BASE
+
+        self.changedRegisters = []
+        for name, change in (("rax", 1), ("rsp", -8), ("rip", None)):
+            index = self.registerIndex(name)
+            if (index is not None):
+                self.registers[index] = self.pc if change is None else (self.registers[index] + change) % (1 << 64)
+                self.changedRegisters.append(index)
+
+        stopped = {"reason": "end-stepping-range"}
+        if (command == "-exec-continue"):
+            stopped = {"reason": "signal-received", "signal-name": "SIGINT", "signal-meaning": "Interrupt"}
+            if (self.breakpoints):
+                number = min(self.breakpoints)
+                stopped = {"reason": "breakpoint-hit", "disp": "keep", "bkptno": str(number)}
+
+        frame = self.frame(1, 0)
+        frame.pop("level")
+        return stopped | {"frame": frame, "thread-id": "1", "stopped-threads": "all", "core": "0"}
+
+    # the ^done results of a command, an MIError turns into ^error
+    def run(self, name: str, args: list[str]) -> dict:
+        if (name == "-thread-info"):
+            ids = [int(args[0])] if args else range(1, self.options.threads + 1)
+            threads = [{"id": str(i), "target-id": f"Thread 0x7ffff7d8{i:04x} (LWP {1000 + i})", "name": "fake",
+                        "frame": self.frame(i, 0), "state": "stopped", "core": str(i % 8)}
+                       for i in ids if 1 <= i <= self.options.threads]
+            if (args and not threads):
+                raise MIError(f"Invalid thread id: {args[0]}")
+
+            return {"threads": threads, "current-thread-id": "1"}
+
+        if (name == "-thread-select"):
+            return {"new-thread-id": args[0], "frame": self.frame(int(args[0]), 0)}
+
+        if (name == "-data-list-register-names"):
+            return {"register-names": self.registerNames}
+
+        if (name == "-data-list-register-values"):
+            numbers = [int(n) for n in args[1:]] or range(len(self.registers))
+            return {"register-values": [{"number": str(n), "value": hex(self.registers[n])}
+                                        for n in numbers if n < len(self.registers)]}
+
+        if (name == "-data-list-changed-registers"):
+            changed, self.changedRegisters = self.changedRegisters, []
+            return {"changed-registers": [str(n) for n in changed]}
+
+        if (name in ("-stack-list-frames", "-stack-list-arguments")):
+            return self.listStack(name, args)
+
+        if (name == "-stack-list-locals"):
+            # GDB's own shape for these: locals=[name="a",name="b"]
+            if (args and args[0] in ("--no-values", "0")):
+                return {"locals": [("name", local) for local in self.localNames]}
+
+            return {"locals": [{"name": local, "value": self.localValue(local)} for local in self.localNames]}
+
+        if (name == "-var-create"):
+            expression = args[-1]
+            if (expression not in self.localNames):
+                raise MIError(f"-var-create: unable to create variable object")
+
+            varObject = f"var{next(self.varNumbers)}"
+            self.varObjects[varObject] = expression
+            return {"name": varObject, "numchild": "4" if expression == "s" else "0",
+                    "value": self.localValue(expression), "type": self.localType(expression),
+                    "thread-id": "1", "has_more": "0"}
+
+        # GDB can't tell what the old variable objects mean in the new program
+        if (name == "-file-exec-and-symbols"):
+            self.varInvalid = {v for v in self.varObjects if "." not in v}
+            return {}
+
+        if (name == "-var-update"):
+            changes = [{"name": varObject, "in_scope": "invalid", "has_more": "0"}
+                       for varObject in sorted(self.varInvalid) if varObject in self.varObjects]
+            self.varInvalid = set()
+            if (self.varUpdated != self.stops):
+                self.varUpdated = self.stops
+                changes += [{"name": varObject, "value": self.localValue(expression), "in_scope": "true",
+                             "type_changed": "false", "has_more": "0"}
+                            for varObject, expression in self.varObjects.items() if expression in ("l0", "s.a")]
+
+            return {"changelist": changes}
+
+        if (name == "-var-list-children"):
+            varObject = args[-1]
+            expression = self.varObjects.get(varObject)
+            if (expression is None):
+                raise MIError("Variable object not found")
+            if (expression != "s"):
+                return {"numchild": "0", "has_more": "0"}
+
+            children = []
+            for field in "abcd":
+                self.varObjects[f"{varObject}.{field}"] = f"s.{field}"
+                children.append(("child", {"name": f"{varObject}.{field}", "exp": field, "numchild": "0",
+                                           "value": self.localValue(f"s.{field}"), "type": "int", "thread-id": "1"}))
+
+            return {"numchild": "4", "children": children, "has_more": "0"}
+
+        if (name == "-var-delete"):
+            varObject = args[-1]
+            deleted = [v for v in self.varObjects if v == varObject or v.startswith(varObject + ".")]
+            for v in deleted:
+                del self.varObjects[v]
+
+            return {"ndeleted": str(len(deleted))}
+
+        if (name == "-data-evaluate-expression"):
+            expression = args[-1]
+            if (expression in self.localNames or expression.startswith("s.")):
+                return {"value": self.localValue(expression)}
+
+            return {"value": str(evaluate(expression, self.pc))}
+
+        if (name == "-data-read-memory-bytes"):
+            offset = 0
+            if (args[0] == "-o"):
+                offset = int(args[1])
+                args = args[2:]
+
+            address = evaluate(args[0], self.pc) + offset
+            length = int(args[1])
+            if (address + length > UNMAPPED):
+                if (address >= UNMAPPED):
+                    raise MIError(f"Unable to read memory.")
+                length = UNMAPPED - address
+
+            start = address % len(MEMORY_PATTERN)
+            repeats = (start + length) // len(MEMORY_PATTERN) + 1
+            contents = (MEMORY_PATTERN * repeats)[start:start + length]
+            return {"memory": [{"begin": hex(address), "offset": "0x0", "end": hex(address + length),
+                                "contents": contents.hex()}]}
+
+        if (name == "-data-disassemble"):
+            start = evaluate(args[args.index("-s") + 1], self.pc)
+            end = evaluate(args[args.index("-e") + 1], self.pc)
+            instructions = []
+            for address in range(start, end, 4):
+                function = (address - PROGRAM_BASE) // FUNCTION_SIZE
+                instructions.append({"address": hex(address), "func-name": f"func_{function}",
+                                     "offset": str((address - PROGRAM_BASE) % FUNCTION_SIZE),
+                                     "inst": INSTRUCTIONS[(address // 4) % len(INSTRUCTIONS)]})
+
+            return {"asm_insns": instructions}
+
+        if (name == "-break-insert"):
+            location = args[-1] if args else ""
+            if (location.startswith("*")):
+                address = evaluate(location[1:], self.pc)
+            elif (location.startswith("func_") and location[5:].isdigit()):
+                address = PROGRAM_BASE + int(location[5:]) * FUNCTION_SIZE
+            elif ("-f" in args[:-1]):
+                # GDB keeps looking for it as code gets loaded
+                number = next(self.breakpointNumbers)
+                self.breakpoints[number] = {"number": str(number), "type": "breakpoint", "disp": "keep", "enabled": "y",
+                                            "addr": "<PENDING>", "pending": location, "times": "0",
+                                            "original-location": location}
+                return {"bkpt": self.breakpoints[number]}
+            else:
+                raise MIError(f"Function \"{location}\" not defined.")
+
+            number = next(self.breakpointNumbers)
+            self.breakpoints[number] = {"number": str(number), "type": "breakpoint", "disp": "keep", "enabled": "y",
+                                        "addr": hex(address), "func": f"func_{(address - PROGRAM_BASE) // FUNCTION_SIZE}",
+                                        "file": "fake.c", "fullname": "/tmp/fake/fake.c", "line": "10",
+                                        "thread-groups": ["i1"], "times": "0", "original-location": location}
+            return {"bkpt": self.breakpoints[number]}
+
+        if (name == "-break-delete"):
+            # no numbers deletes them all
+            for number in args or list(self.breakpoints):
+                self.breakpoints.pop(int(number), None)
+
+            return {}
+
+        if (name == "-break-list"):
+            return {"BreakpointTable": {"nr_rows": str(len(self.breakpoints)), "nr_cols": "6", "hdr": [],
+                                        "body": [("bkpt", b) for b in self.breakpoints.values()]}}
+
+        if (name in ("-symbol-info-functions", "-symbol-info-variables")):
+            kind = "func" if name == "-symbol-info-functions" else "var"
+            return {"symbols": {"nondebugging": [{"address": hex(PROGRAM_BASE + n * FUNCTION_SIZE), "name": f"{kind}_{n}"}
+                                                 for n in range(self.options.frames)]}}
+
+        if (name == "-gdb-show"):
+            return {"value": ""}
+
+        if (name in QUIET_COMMANDS):
+            return {}
+
+        raise MIError(f"Undefined MI command: {name[1:]}")
+
+    def listStack(self, name: str, args: list[str]) -> dict:
+        thread = 1
+        if ("--thread" in args):
+            i = args.index("--thread")
+            thread = int(args[i + 1])
+            del args[i:i + 2]
+
+        bounds = [int(a) for a in args if not a.startswith("--") and a.lstrip("-").isdigit()]
+        low, high = bounds if len(bounds) == 2 else (0, self.depth(thread) - 1)
+        levels = range(low, min(high, self.depth(thread) - 1) + 1)
+        if (low >= self.depth(thread)):
+            raise MIError("-stack-list-frames: Not enough frames in stack.")
+
+        if (name == "-stack-list-frames"):
+            return {"stack": [("frame", self.frame(thread, level)) for level in levels]}
+
+        return {"stack-args": [("frame", {"level": str(level), "args": [{"name": "n", "type": "int", "value": str(level)}]})
+                               for level in levels]}
+
+# records from a real GDB, as {"command": ..., "output": [...]} lines. an
+# empty command is what GDB said before the first one. tokens are left out
+# of the output and put back on replay
+class Transcript:
+    def __init__(self, path: str):
+        self.greeting: list[str] = []
+        # the same command can have been answered differently over time,
+        # the answers are handed out in order and then start over
+        self.byCommand: dict[str, deque[list[str]]] = {}
+        self.byName: dict[str, deque[list[str]]] = {}
+
+        with open(path) as transcriptFile:
+            for line in transcriptFile:
+                if (not line.strip()):
+                    continue
+
+                entry = json.loads(line)
+                command = entry.get("command") or ""
+                if (not command):
+                    self.greeting.extend(entry.get("output", []))
+                    continue
+
+                self.byCommand.setdefault(command, deque()).append(entry["output"])
+                self.byName.setdefault(command.split()[0], deque()).append(entry["output"])
+
+    def take(self, answers: dict[str, deque[list[str]]], key: str) -> list[str] | None:
+        queue = answers.get(key)
+        if (not queue):
+            return None
+
+        output = queue.popleft()
+        queue.append(output)
+        return output
+
+    # the recorded output for a command, the same command first, else
+    # another one with the same name. None if it was never recorded
+    def reply(self, token: str, command: str, exact: bool) -> list[str] | None:
+        output = self.take(self.byCommand, command)
+        if (output is None and not exact):
+            output = self.take(self.byName, command.split()[0])
+        if (output is None):
+            return None
+
+        return [token + line if line.startswith("^") else line for line in output]
+
+class TranscriptRecorder:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = Lock()
+        self.entries: list[dict] = [{"command": "", "output": []}]
+        # token -> command, until its result comes
+        self.commands: dict[str, str] = {}
+        # stream output since the last result, it belongs to the next one
+        self.streams: list[str] = []
+
+    def command(self, line: str):
+        match = re.match(r"^(\d*)(.*)$", line.strip())
+        with self.lock:
+            self.commands[match.group(1)] = match.group(2).strip()
+
+    def output(self, line: str):
+        line = line.rstrip("\r\n")
+        if (not line or line.startswith("(gdb)")):
+            return
+
+        match = RECORD_RE.match(line)
+        kind = match.group(2) if match else ""
+        text = kind + match.group(3) if match else line
+
+        with self.lock:
+            if (kind == "^"):
+                command = self.commands.pop(match.group(1), "?")
+                self.entries.append({"command": command, "output": self.streams + [text]})
+                self.streams = []
+            elif (kind in ("*", "=") or len(self.entries) == 1):
+                # async records follow the command that caused them
+                self.entries[-1]["output"].append(text)
+            else:
+                self.streams.append(text)
+
+    def save(self):
+        with self.lock, open(self.path, "w") as transcriptFile:
+            for entry in self.entries:
+                transcriptFile.write(json.dumps(entry) + "\n")
+
+class FakeGdb:
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.target = FakeTarget(options)
+        self.transcript = Transcript(options.transcript) if options.transcript else None
+        self.random = random.Random(options.seed)
+        self.out = sys.stdout.buffer
+
+    def write(self, lines: list[str]):
+        self.out.write(("\n".join(lines) + "\n(gdb) \n").encode())
+        self.out.flush()
+
+    def wait(self):
+        delay = self.options.latency + self.random.uniform(0, self.options.jitter)
+        if (delay > 0):
+            time.sleep(delay / 1000)
+
+    def console(self, text: str) -> str:
+        return "~" + miString(text)
+
+    def handle(self, line: str) -> bool:
+        match = re.match(r"^(\d*)(.*)$", line.strip())
+        token, command = match.group(1), match.group(2).strip()
+        if (not command):
+            return True
+
+        self.wait()
+
+        if (self.transcript is not None):
+            output = self.transcript.reply(token, command, self.options.exact)
+            if (output is not None):
+                self.write(output)
+                return not command.startswith("-gdb-exit")
+
+        try:
+            args = shlex.split(command)
+        except ValueError:
+            args = command.split()
+        name = args[0] if args else ""
+
+        if (name == "-gdb-exit"):
+            self.write([f"{token}^exit"])
+            return False
+
+        if (name == "-gdb-version"):
+            self.write([self.console("GNU gdb (fake) 0.1\n"), f"{token}^done"])
+            return True
+
+        if (name in EXEC_COMMANDS):
+            stopped = self.target.step(name)
+            output = [f"{token}^running", '*running,thread-id="all"']
+            output += [self.console(f"fake target output line {n}\n") for n in range(self.options.console_lines)]
+            output.append("*stopped," + miResults(stopped))
+            self.write(output)
+            return True
+
+        if (not name.startswith("-")):
+            # a CLI command, GDB echoes it back
+            self.write([self.console(command + "\n"), f"{token}^done"])
+            return True
+
+        try:
+            results = self.target.run(name, args[1:])
+        except (MIError, ValueError, IndexError) as e:
+            self.write([f"{token}^error,msg={miString(str(e) or 'Bad arguments')}"])
+            return True
+
+        self.write([f"{token}^done" + ("," + miResults(results) if results else "")])
+        return True
+
+    def serve(self):
+        greeting = ['=thread-group-added,id="i1"']
+        if (self.transcript is not None and self.transcript.greeting):
+            greeting = self.transcript.greeting
+        self.write(greeting)
+
+        for line in sys.stdin:
+            if (not self.handle(line)):
+                break
+
+# passes everything through to a real GDB and writes down what it said
+def record(path: str, command: list[str]) -> int:
+    recorder = TranscriptRecorder(path)
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+
+    def forwardOutput():
+        for line in process.stdout:
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+            recorder.output(line.decode(errors="replace"))
+
+    reader = Thread(target=forwardOutput, daemon=True)
+    reader.start()
+
+    try:
+        for line in sys.stdin.buffer:
+            recorder.command(line.decode(errors="replace"))
+            process.stdin.write(line)
+            process.stdin.flush()
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        status = process.wait()
+        reader.join(timeout=1)
+        recorder.save()
+
+    return status
+
+def parseArgs(argv: list[str]) -> tuple[argparse.Namespace, list[str]]:
+    gdbCommand = []
+    if ("--" in argv):
+        gdbCommand = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+
+    parser = argparse.ArgumentParser(description="Fake GDB/MI process for benchmarks and offline runs")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds before every reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more milliseconds, at random")
+    parser.add_argument("--seed", type=int, default=0, help="for the jitter")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=64, help="stack depth of thread 1")
+    parser.add_argument("--locals", type=int, default=8)
+    parser.add_argument("--registers", type=int, default=len(REGISTER_NAMES))
+    parser.add_argument("--console-lines", type=int, default=0, help="target output lines on every step")
+    parser.add_argument("--transcript", help="replay GDB's answers from this file, made with --record")
+    parser.add_argument("--exact", action="store_true",
+                        help="replay only for the exact same commands, not for ones with the same name")
+    parser.add_argument("--record", metavar="TRANSCRIPT", help="run the GDB after -- and record what it says")
+    # whatever gets passed to a real GDB (--interpreter=mi2, the program, ...)
+    options, _ = parser.parse_known_args(argv)
+
+    return options, gdbCommand
+
+def main(argv: list[str]) -> int:
+    options, gdbCommand = parseArgs(argv)
+    if (options.record):
+        if (not gdbCommand):
+            print("--record needs the GDB command after --", file=sys.stderr)
+            return 2
+
+        return record(options.record, gdbCommand)
+
+    FakeGdb(options).serve()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
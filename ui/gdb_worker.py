@@ -0,0 +1,150 @@
+import time
+from itertools import count
+from queue import Empty, Queue
+
+from loguru import logger
+from PySide6.QtCore import QThread, Signal
+from typing_extensions import Any, Callable
+
+from backend.gdbmi import GdbMI
+from ui.model import SGDBModel
+
+# owns GDB and does all the talking to it, so the GUI thread never waits.
+# views hand it functions to run with call(), results come back as signals
+class GdbWorker(QThread):
+    # the SGDBModel, once GDB is up
+    gdbStarted = Signal(object)
+    gdbFailed = Signal(str)
+    # request id, whatever the function returned
+    resultReady = Signal(int, object)
+    # request id, the exception it raised
+    callFailed = Signal(int, object)
+    # every async record GDB sends
+    recordReceived = Signal(object)
+
+    # stream records (console, target and log output)
+    STREAM_TYPES = ("console", "target", "log")
+
+    # workers told to stop that haven't finished yet
+    stopping: set["GdbWorker"] = set()
+
+    # onStreamRecord gets the stream records right on GDB's reader thread:
+    # a flood of output shouldn't turn into a flood of GUI events. command
+    # is the GDB to run, like GdbMI's
+    def __init__(self, gdbArgs: list[str], onStreamRecord: Callable[[dict], None] | None = None,
+                 command: list[str] | None = None):
+        super().__init__()
+        self.gdbArgs = gdbArgs
+        self.command = command
+        self.onStreamRecord = onStreamRecord
+        self.model: SGDBModel | None = None
+
+        self.jobs: Queue = Queue()
+        self.requestIds = count(1)
+        # request id -> (callback, errback), only touched on the GUI thread
+        self.callbacks: dict[int, tuple[Callable | None, Callable | None]] = {}
+
+        # this object lives on the GUI thread, so these run there
+        self.resultReady.connect(self.deliverResult)
+        self.callFailed.connect(self.deliverFailure)
+
+    def run(self):
+        try:
+            gdbMI = GdbMI(self.gdbArgs, command=self.command)
+        except Exception as e:
+            logger.error(f"Couldn't start GDB: {e}")
+            self.gdbFailed.emit(str(e))
+            return
+
+        self.model = SGDBModel(gdbMI)
+        # after the model's own listeners, so its caches already know about
+        # a record by the time anyone reacts to it
+        gdbMI.addRecordListener(self.dispatchRecord)
+        self.gdbStarted.emit(self.model)
+
+        while True:
+            job = self.jobs.get()
+            if (job is None):
+                break
+
+            requestId, function, args = job
+            try:
+                result = function(*args)
+            except Exception as e:
+                logger.debug(f"Request {requestId} failed: {e}")
+                self.callFailed.emit(requestId, e)
+                continue
+
+            self.resultReady.emit(requestId, result)
+
+        if (gdbMI.running):
+            try:
+                gdbMI.quit()
+            except Exception as e:
+                logger.warning(f"GDB didn't quit cleanly: {e}")
+
+    # on the reader thread
+    def dispatchRecord(self, record: dict):
+        if (record.get("type") in self.STREAM_TYPES):
+            if (self.onStreamRecord is not None):
+                self.onStreamRecord(record)
+            return
+
+        self.recordReceived.emit(record)
+
+    # runs function(*args) on the worker thread, callback/errback get called
+    # on the GUI thread with the result/exception
+    def call(self, function: Callable, *args: Any, callback: Callable | None = None, errback: Callable | None = None) -> int:
+        requestId = next(self.requestIds)
+        if (callback or errback):
+            self.callbacks[requestId] = (callback, errback)
+
+        self.jobs.put((requestId, function, args))
+        return requestId
+
+    def deliverResult(self, requestId: int, result: object):
+        callback, _ = self.callbacks.pop(requestId, (None, None))
+        if (callback):
+            callback(result)
+
+    def deliverFailure(self, requestId: int, error: object):
+        _, errback = self.callbacks.pop(requestId, (None, None))
+        if (errback):
+            errback(error)
+        else:
+            logger.warning(f"Request {requestId} failed: {error}")
+
+    # doesn't wait: whatever job is running and GDB's exit finish in the
+    # background, the worker is kept alive until then. last runs on the
+    # worker right before GDB exits
+    def stop(self, last: Callable | None = None):
+        # nobody wants the results of the queued ones anymore
+        try:
+            while True:
+                self.jobs.get_nowait()
+        except Empty:
+            pass
+        self.callbacks.clear()
+
+        if (last is not None):
+            self.jobs.put((next(self.requestIds), last, ()))
+        self.jobs.put(None)
+        GdbWorker.stopping.add(self)
+        self.finished.connect(lambda: GdbWorker.stopping.discard(self))
+
+    def kill(self):
+        if (self.model is not None):
+            self.model.gdbMI.kill()
+
+    # on the way out, once the windows are gone. workers (and their GDBs)
+    # that take longer than timeout seconds get killed
+    @classmethod
+    def waitForStopped(cls, timeout: float):
+        deadline = time.monotonic() + timeout
+        for worker in list(cls.stopping):
+            if (not worker.wait(max(int((deadline - time.monotonic()) * 1000), 0))):
+                logger.warning("GDB worker didn't stop in time, killing its GDB")
+                worker.kill()
+                worker.wait(1000)
+
+        cls.stopping.clear()
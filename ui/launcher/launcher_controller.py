@@ -1,21 +1,47 @@
 from loguru import logger
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QFileDialog, QListWidgetItem, QMessageBox
+
 from ui import observer
 from ui.launcher import launcher_view
+from ui.session import Session
 
 class LauncherController:
     def __init__(self, view: launcher_view.LauncherView):
         self.view = view
 
         self.view.openButton.clicked.connect(self.openSession)
-        self.view.createButton.clicked.connect(self.startSession)
+        self.view.createButton.clicked.connect(self.newSession)
+        self.view.sessionsList.itemDoubleClicked.connect(self.openRecentSession)
 
     def openSession(self):
-        logger.debug("Using config")
+        path, _ = QFileDialog.getOpenFileName(self.view, "Open Session", "", "SideGDB sessions (*.json)")
+        if (path):
+            self.openPath(path)
+
+    def openRecentSession(self, item: QListWidgetItem):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        if (path):
+            self.openPath(path)
+
+    # False if the session couldn't be opened, the user got told why
+    def openPath(self, path: str) -> bool:
+        logger.debug(f"Using config {path}")
+        try:
+            session = Session.load(path)
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Couldn't open session {path}: {e}")
+            QMessageBox.critical(self.view, "Open Session", f"Couldn't open session {path}:\n{e}")
+            return False
+
+        self.startSession(session)
+        return True
 
-        self.startSession()
+    def newSession(self):
+        self.startSession(Session())
 
-    def startSession(self):
+    def startSession(self, session: Session):
         logger.debug("Starting main UI")
         self.view.close()
 
-        observer.notify(observer.SGSignals.SGDB_SIGSTART)
+        observer.notify(observer.SGSignals.SGDB_SIGSTART, session)
@@ -1,6 +1,8 @@
 from PySide6 import QtWidgets
 from PySide6.QtCore import QFlag, Qt
 
+from ui.session import recentSessions
+
 class LauncherView(QtWidgets.QMdiSubWindow):
     def __init__(self, /, parent: QtWidgets.QMdiArea):
         super().__init__(parent)
@@ -17,7 +19,10 @@ class LauncherView(QtWidgets.QMdiSubWindow):
         self.openButton = QtWidgets.QPushButton("Open GDB Session...")
 
         self.sessionsList = QtWidgets.QListWidget()
-        self.sessionsList.addItem("Session name [path to config]")
+        for recent in recentSessions():
+            item = QtWidgets.QListWidgetItem(f"{recent.get('name')} [{recent.get('path')}]")
+            item.setData(Qt.ItemDataRole.UserRole, recent.get("path"))
+            self.sessionsList.addItem(item)
 
         self.mainWidget = QtWidgets.QWidget()
         self.gridLayout = QtWidgets.QGridLayout()
@@ -1,8 +1,121 @@
+from loguru import logger
+from PySide6.QtWidgets import QApplication, QFileDialog, QMdiSubWindow, QMessageBox
+
 from ui import observer
 from ui.main_view import MainView
+from ui.session import Session
+from ui.target_controller import TargetController
 
+# the session manager: every session started becomes one more target with
+# its own GDB and windows, next to the ones already open
 class SGDBController:
     def __init__(self, view: MainView):
         self.view = view
+        self.targets: list[TargetController] = []
+        self.mainUILoaded = False
+
+        # payload: the Session to start
+        observer.subscribe(observer.SGSignals.SGDB_SIGSTART, self.startSession)
+        observer.subscribe(observer.SGSignals.SGDB_SIGEND, self.stopAll)
+
+        self.view.openSessionAction.triggered.connect(self.openSession)
+        self.view.saveSessionAction.triggered.connect(self.saveSession)
+        self.view.cancelPreRunAction.triggered.connect(self.cancelPreRun)
+        self.view.restartTargetAction.triggered.connect(self.restartTarget)
+        self.view.statsAction.triggered.connect(self.showStats)
+        self.view.mdiArea.subWindowActivated.connect(self.onSubWindowActivated)
+
+        QApplication.instance().aboutToQuit.connect(self.stopAll)
+
+    def startSession(self, session: Session | None = None):
+        if (not self.mainUILoaded):
+            self.view.loadMainUI()
+            self.view.quitSessionAction.triggered.connect(self.quitSession)
+            self.mainUILoaded = True
+
+        session = session or Session()
+        target = TargetController(self.view, session, len(self.targets), self.updateActions)
+        self.view.restoreLayout(session.layout, target.windows, main=not self.targets)
+        self.targets.append(target)
+        target.start()
+
+        self.updateActions()
+
+    # the target whose window has the focus, or the last one opened
+    def activeTarget(self) -> TargetController | None:
+        subWindow = self.view.mdiArea.activeSubWindow()
+        return next((t for t in self.targets if t.windows.owns(subWindow)), self.targets[-1] if self.targets else None)
+
+    def onSubWindowActivated(self, subWindow: QMdiSubWindow | None):
+        self.updateActions()
+
+    def updateActions(self):
+        target = self.activeTarget()
+        self.view.cancelPreRunAction.setEnabled(target is not None and target.preRun is not None)
+        self.view.restartTargetAction.setEnabled(target is not None and target.failed)
+
+        if (target is not None):
+            self.view.setWindowTitle(f"{self.view.appTitle} - {target.session.sessionName}")
+        else:
+            self.view.setWindowTitle(self.view.appTitle)
+
+    def openSession(self):
+        path, _ = QFileDialog.getOpenFileName(self.view, "Open Session", "", "SideGDB sessions (*.json)")
+        if (not path):
+            return
+
+        try:
+            session = Session.load(path)
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Couldn't open session {path}: {e}")
+            QMessageBox.critical(self.view, "Open Session", f"Couldn't open session {path}:\n{e}")
+            return
+
+        observer.notify(observer.SGSignals.SGDB_SIGSTART, session)
+
+    def saveSession(self):
+        target = self.activeTarget()
+        if (target is None):
+            return
+
+        if (not target.session.path):
+            path, _ = QFileDialog.getSaveFileName(self.view, "Save Session", f"{target.session.sessionName}.json",
+                                                  "SideGDB sessions (*.json)")
+            if (not path):
+                return
+            target.session.path = path
+
+        try:
+            target.saveSession()
+        except OSError as e:
+            logger.error(f"Couldn't save session {target.session.path}: {e}")
+
+    def cancelPreRun(self):
+        target = self.activeTarget()
+        if (target is not None):
+            target.cancelPreRun()
+
+    def restartTarget(self):
+        target = self.activeTarget()
+        if (target is not None):
+            target.restart()
+
+    def showStats(self):
+        target = self.activeTarget()
+        if (target is not None):
+            target.showStats()
+
+    def quitSession(self):
+        target = self.activeTarget()
+        if (target is None):
+            return
+
+        target.stop()
+        self.targets.remove(target)
+        self.updateActions()
+
+    def stopAll(self):
+        for target in self.targets:
+            target.stop()
 
-        observer.subscribe(observer.SGSignals.SGDB_SIGSTART, self.view.loadMainUI)
+        self.targets.clear()
@@ -8,13 +8,19 @@ class MainView(QtWidgets.QMainWindow):
     def __init__(self, appTitle):
         super().__init__()
 
+        self.appTitle = appTitle
         self.setWindowTitle(appTitle)
 
         self.fileMenu = QtWidgets.QMenu("File")
-        self.fileMenu.addAction("Open Session...")
-        self.fileMenu.addAction("Save Session")
+        self.openSessionAction = self.fileMenu.addAction("Open Session...")
+        self.saveSessionAction = self.fileMenu.addAction("Save Session")
         self.fileMenu.addSeparator()
+        self.cancelPreRunAction = self.fileMenu.addAction("Cancel Pre-run Commands")
+        self.cancelPreRunAction.setEnabled(False)
+        self.restartTargetAction = self.fileMenu.addAction("Restart Target")
+        self.restartTargetAction.setEnabled(False)
         self.fileMenu.addAction("Configure GDB...")
+        self.statsAction = self.fileMenu.addAction("GDB Statistics...")
 
         self.setMenuBar(QtWidgets.QMenuBar(self))
         self.menuBar().addMenu(self.fileMenu)
@@ -30,29 +36,79 @@ class MainView(QtWidgets.QMainWindow):
         self.update()
 
         # Update menu bar
-        self.fileMenu.addAction("Quit Session")
+        self.quitSessionAction = self.fileMenu.addAction("Quit Session")
         self.codeMenu = QtWidgets.QMenu("Code")
         self.codeMenu.addAction("Manage breakpoints...")
         self.menuBar().addMenu(self.codeMenu)
 
-        # create UI elements
-        self.codeSubWindow = code_view.CodeDebugView(self.mdiArea)
-        self.rightSubWindow = right_view.RightView(self.mdiArea)
-        self.bottomSubWindow = bottom_view.BottomView(self.mdiArea)
+    # a new set of windows for one target, a bit below and to the right of
+    # the ones already open
+    def createTargetWindows(self, name: str, index: int) -> "TargetWindows":
+        offset = 30 * index
+        windows = TargetWindows(self.mdiArea, name)
 
         cWindowWidth = 600
         cWindowHeight = 400
 
-        self.codeSubWindow.setGeometry(0, 0, cWindowWidth, cWindowHeight)
-        self.rightSubWindow.setGeometry(cWindowWidth,
-                                        0,
-                                        self.width() - cWindowWidth,
-                                        self.height() - self.menuBar().height())
-        self.bottomSubWindow.setGeometry(0, cWindowHeight,
-                                         cWindowWidth,
-                                         self.height() - cWindowHeight - self.menuBar().height())
+        windows.codeSubWindow.setGeometry(offset, offset, cWindowWidth, cWindowHeight)
+        windows.rightSubWindow.setGeometry(cWindowWidth + offset,
+                                           offset,
+                                           self.width() - cWindowWidth,
+                                           self.height() - self.menuBar().height())
+        windows.bottomSubWindow.setGeometry(offset, cWindowHeight + offset,
+                                            cWindowWidth,
+                                            self.height() - cWindowHeight - self.menuBar().height())
 
         # idk why
-        self.codeSubWindow.show()
-        self.rightSubWindow.show()
-        self.bottomSubWindow.show()
+        windows.codeSubWindow.show()
+        windows.rightSubWindow.show()
+        windows.bottomSubWindow.show()
+
+        return windows
+
+    def layoutWindows(self, target: "TargetWindows | None") -> dict[str, QtWidgets.QWidget]:
+        windows = {"main": self}
+        if (target is not None):
+            windows.update(target.windows())
+
+        return windows
+
+    # window name -> [x, y, width, height], what a Session keeps
+    def saveLayout(self, target: "TargetWindows | None") -> dict[str, list[int]]:
+        layout = {}
+        for name, window in self.layoutWindows(target).items():
+            geometry = window.geometry()
+            layout[name] = [geometry.x(), geometry.y(), geometry.width(), geometry.height()]
+
+        return layout
+
+    # the main window only moves for the first target, not every one opened after it
+    def restoreLayout(self, layout: dict[str, list[int]], target: "TargetWindows | None", main: bool = True):
+        for name, window in self.layoutWindows(target).items():
+            if (len(layout.get(name, [])) == 4 and (main or window is not self)):
+                window.setGeometry(*layout[name])
+
+# the sub-windows that show one target
+class TargetWindows:
+    NAMES = ("code", "right", "bottom")
+
+    def __init__(self, mdiArea: QtWidgets.QMdiArea, name: str):
+        self.codeSubWindow = code_view.CodeDebugView(mdiArea)
+        self.rightSubWindow = right_view.RightView(mdiArea)
+        self.bottomSubWindow = bottom_view.BottomView(mdiArea)
+
+        # with more than one target open, the titles tell them apart
+        self.codeSubWindow.titlePrefix = f"[{name}] "
+        for window in self.windows().values():
+            window.setWindowTitle(f"[{name}] {window.windowTitle()}")
+
+    def windows(self) -> dict[str, QtWidgets.QMdiSubWindow]:
+        return dict(zip(self.NAMES, (self.codeSubWindow, self.rightSubWindow, self.bottomSubWindow)))
+
+    def owns(self, subWindow: QtWidgets.QMdiSubWindow | None) -> bool:
+        return subWindow is not None and any(subWindow is window for window in self.windows().values())
+
+    def close(self):
+        for window in self.windows().values():
+            window.close()
+            window.deleteLater()
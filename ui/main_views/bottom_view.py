@@ -1,6 +1,9 @@
 from PySide6 import QtWidgets
 from PySide6.QtCore import Qt
 
+from ui.main_views.console_view import ConsoleView
+from ui.main_views.memory_view import MemoryHexView
+
 class BottomView(QtWidgets.QMdiSubWindow):
     def __init__(self, /, parent: QtWidgets.QWidget | None):
         super().__init__(parent)
@@ -10,7 +13,10 @@ class BottomView(QtWidgets.QMdiSubWindow):
 
         self.tabView = QtWidgets.QTabWidget()
 
-        self.tabView.addTab(QtWidgets.QWidget(), "Memory")
-        self.tabView.addTab(QtWidgets.QWidget(), "GDB Console")
+        self.memoryView = MemoryHexView()
+        self.consoleView = ConsoleView()
+
+        self.tabView.addTab(self.memoryView, "Memory")
+        self.tabView.addTab(self.consoleView, "GDB Console")
 
         self.setWidget(self.tabView)
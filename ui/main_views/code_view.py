@@ -1,5 +1,10 @@
+from collections import OrderedDict
+
 from PySide6 import QtWidgets
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QFontDatabase, QTextCursor, QTextDocument, QTextFormat
+
+from backend.source import SourceDocument
 
 testTest = r"""// THIS IS JUST A PLACEHOLDER NOT A REAL PROGRAM
 #include <stdio.h>
@@ -9,17 +14,84 @@ int main() {
     return 0;
 }"""
 
+# the part of a source file that's in a QTextDocument: lines around where
+# we stopped, grown a page at a time when the view scrolls to either end
+class SourcePage:
+    __slots__ = ("source", "document", "first", "last")
+
+    def __init__(self, source: SourceDocument, document: QTextDocument):
+        self.source = source
+        self.document = document
+        # lines first to last (from 1) are in the document
+        self.first = 1
+        self.last = 0
+
+    def contains(self, line: int) -> bool:
+        return self.first <= line <= self.last
+
+    def text(self, first: int, last: int) -> str:
+        text = self.source.lines(first, last)
+        return text[:-1] if text.endswith("\n") else text
+
+    def load(self, line: int, pageLines: int):
+        self.first = max(line - pageLines, 1)
+        self.last = min(line + pageLines, self.source.lineCount())
+        self.document.setPlainText(self.text(self.first, self.last))
+
+    # returns how many lines went in
+    def prepend(self, pageLines: int) -> int:
+        first = max(self.first - pageLines, 1)
+        if (first == self.first):
+            return 0
+
+        cursor = QTextCursor(self.document)
+        cursor.movePosition(QTextCursor.MoveOperation.Start)
+        cursor.insertText(self.text(first, self.first - 1) + "\n")
+
+        added = self.first - first
+        self.first = first
+        return added
+
+    def append(self, pageLines: int) -> int:
+        last = min(self.last + pageLines, self.source.lineCount())
+        if (last == self.last):
+            return 0
+
+        cursor = QTextCursor(self.document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText("\n" + self.text(self.last + 1, last))
+
+        added = last - self.last
+        self.last = last
+        return added
+
 class CodeDebugView(QtWidgets.QMdiSubWindow):
+    # pages we keep around, going back to one of these is instant
+    MAX_DOCUMENTS = 8
+    # lines laid out on each side of the one we stopped at, and added at a
+    # time when scrolling past them. a big file is never laid out whole
+    PAGE_LINES = 500
+
     def __init__(self, /, parent: QtWidgets.QWidget | None):
         super().__init__(parent)
 
         self.setWindowTitle("Code")
+        # which target this is, for the title
+        self.titlePrefix = ""
         self.resize(600, 400)
 
         self.splitter = QtWidgets.QSplitter(Qt.Orientation.Horizontal)
 
-        self.textView = QtWidgets.QTextEdit()
-        self.textView.setText(testTest)
+        self.textView = QtWidgets.QPlainTextEdit()
+        self.textView.setReadOnly(True)
+        self.textView.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        self.textView.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.textView.setPlainText(testTest)
+
+        # (path, mtime) -> its page, least recently used first
+        self.documents: OrderedDict[tuple[str, int], SourcePage] = OrderedDict()
+        self.currentSource: tuple[str, int] | None = None
+        self.textView.verticalScrollBar().valueChanged.connect(self.onScrolled)
 
         self.gdbButtonsWidget = QtWidgets.QWidget()
         self.gdbButtons = QtWidgets.QVBoxLayout(self.gdbButtonsWidget)
@@ -33,3 +105,67 @@ class CodeDebugView(QtWidgets.QMdiSubWindow):
         self.splitter.setSizes([500, 100])
 
         self.setWidget(self.splitter)
+
+    def currentPage(self) -> SourcePage | None:
+        return self.documents.get(self.currentSource) if self.currentSource is not None else None
+
+    def showSource(self, source: SourceDocument, line: int | None):
+        key = (source.path, source.mtime)
+
+        page = self.documents.get(key)
+        if (page is None):
+            document = QTextDocument(self)
+            document.setDocumentLayout(QtWidgets.QPlainTextDocumentLayout(document))
+            document.setDefaultFont(self.textView.font())
+            page = SourcePage(source, document)
+            page.load(line or 1, self.PAGE_LINES)
+            self.documents[key] = page
+
+            while (len(self.documents) > self.MAX_DOCUMENTS):
+                _, old = self.documents.popitem(last=False)
+                old.document.deleteLater()
+        elif (line is not None and not page.contains(line)):
+            page.load(line, self.PAGE_LINES)
+
+        self.documents.move_to_end(key)
+        # switching documents scrolls to the top, that's not the user asking for more
+        scrollBar = self.textView.verticalScrollBar()
+        scrollBar.blockSignals(True)
+        if (key != self.currentSource):
+            self.currentSource = key
+            self.textView.setDocument(page.document)
+            self.setWindowTitle(f"{self.titlePrefix}Code - {source.path}")
+
+        if (line is not None):
+            self.showLine(line)
+        scrollBar.blockSignals(False)
+
+    # at either end of what's laid out, the next page goes in
+    def onScrolled(self, value: int):
+        page = self.currentPage()
+        if (page is None):
+            return
+
+        scrollBar = self.textView.verticalScrollBar()
+        if (value == scrollBar.minimum()):
+            added = page.prepend(self.PAGE_LINES)
+            if (added):
+                # stay on the same line, it just moved down
+                scrollBar.setValue(value + added)
+        elif (value == scrollBar.maximum()):
+            page.append(self.PAGE_LINES)
+
+    def showLine(self, line: int):
+        page = self.currentPage()
+        first = page.first if page is not None else 1
+
+        block = self.textView.document().findBlockByNumber(line - first)
+        cursor = QTextCursor(block)
+        self.textView.setTextCursor(cursor)
+        self.textView.centerCursor()
+
+        highlight = QtWidgets.QTextEdit.ExtraSelection()
+        highlight.format.setBackground(QColor(255, 230, 0, 80))
+        highlight.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+        highlight.cursor = cursor
+        self.textView.setExtraSelections([highlight])
@@ -0,0 +1,151 @@
+from collections import deque
+from threading import Lock
+
+from PySide6 import QtWidgets
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QColor, QFontDatabase, QTextCharFormat, QTextCursor
+
+from ui.observer import runOnGui
+
+# GDB's console/target/log output and the pre-run commands' output. records
+# go in a ring buffer from any thread, the text view catches up at most once
+# a frame with everything that arrived since, so a flood of output costs one
+# append per frame instead of one per record
+class ConsoleView(QtWidgets.QWidget):
+    # records kept for when the filter changes, older ones get dropped
+    CAPACITY = 20000
+    # older lines get dropped from the text view too
+    MAX_LINES = 10000
+    FRAME_MS = 33
+
+    STREAMS = {"console": "Console", "target": "Target", "log": "Log"}
+    COLORS = {"log": QColor(128, 128, 128)}
+
+    def __init__(self, /, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+
+        # (stream type, text)
+        self.records: deque[tuple[str, str]] = deque(maxlen=self.CAPACITY)
+        # what arrived since the last frame
+        self.pending: deque[tuple[str, str]] = deque(maxlen=self.CAPACITY)
+        # how many records arrived since the last frame, pending could have dropped some
+        self.pendingCount = 0
+        self.recordsLock = Lock()
+        self.renderScheduled = False
+
+        self.shownStreams = set(self.STREAMS)
+
+        self.textView = QtWidgets.QPlainTextEdit()
+        self.textView.setReadOnly(True)
+        self.textView.setUndoRedoEnabled(False)
+        self.textView.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        self.textView.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.textView.setMaximumBlockCount(self.MAX_LINES)
+
+        self.filterLayout = QtWidgets.QHBoxLayout()
+        self.streamBoxes = {}
+        for stream, label in self.STREAMS.items():
+            box = QtWidgets.QCheckBox(label)
+            box.setChecked(True)
+            box.toggled.connect(self.onFilterChanged)
+            self.streamBoxes[stream] = box
+            self.filterLayout.addWidget(box)
+        self.filterLayout.addStretch()
+
+        self.clearButton = QtWidgets.QPushButton("Clear")
+        self.clearButton.clicked.connect(self.clear)
+        self.filterLayout.addWidget(self.clearButton)
+
+        self.mainLayout = QtWidgets.QVBoxLayout(self)
+        self.mainLayout.addLayout(self.filterLayout)
+        self.mainLayout.addWidget(self.textView)
+
+        self.renderTimer = QTimer(self)
+        self.renderTimer.setSingleShot(True)
+        self.renderTimer.setInterval(self.FRAME_MS)
+        self.renderTimer.timeout.connect(self.render)
+
+    # a stream record, payload is the text. safe to call from any thread
+    def appendRecord(self, record: dict):
+        text = record.get("payload")
+        if (not isinstance(text, str) or not text):
+            return
+
+        with self.recordsLock:
+            self.records.append((record.get("type", "console"), text))
+            self.pending.append(self.records[-1])
+            self.pendingCount += 1
+
+            scheduled = self.renderScheduled
+            self.renderScheduled = True
+
+        if (not scheduled):
+            runOnGui(self.renderTimer.start)
+
+    def takePending(self) -> tuple[list[tuple[str, str]], bool]:
+        with self.recordsLock:
+            pending = list(self.pending)
+            overflowed = self.pendingCount > len(pending)
+            self.pending.clear()
+            self.pendingCount = 0
+            self.renderScheduled = False
+
+        return pending, overflowed
+
+    def render(self):
+        pending, overflowed = self.takePending()
+        if (overflowed):
+            # more arrived in one frame than we keep, start over from what's left
+            self.rebuild()
+            return
+
+        self.appendText(pending)
+
+    def appendText(self, records: list[tuple[str, str]]):
+        shown = [(stream, text) for stream, text in records if stream in self.shownStreams]
+        if (not shown):
+            return
+
+        scrollBar = self.textView.verticalScrollBar()
+        following = scrollBar.value() == scrollBar.maximum()
+
+        cursor = QTextCursor(self.textView.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+
+        # one insert per run of records of the same type
+        start = 0
+        for i in range(1, len(shown) + 1):
+            if (i == len(shown) or shown[i][0] != shown[start][0]):
+                textFormat = QTextCharFormat()
+                if (shown[start][0] in self.COLORS):
+                    textFormat.setForeground(self.COLORS[shown[start][0]])
+                cursor.insertText("".join(text for _, text in shown[start:i]), textFormat)
+                start = i
+
+        cursor.endEditBlock()
+
+        if (following):
+            scrollBar.setValue(scrollBar.maximum())
+
+    # the whole text again from the ring buffer, after the filter changed
+    def rebuild(self):
+        with self.recordsLock:
+            records = list(self.records)
+            self.pending.clear()
+            self.pendingCount = 0
+
+        self.textView.clear()
+        self.appendText(records)
+
+    def onFilterChanged(self):
+        self.shownStreams = {stream for stream, box in self.streamBoxes.items() if box.isChecked()}
+        self.rebuild()
+
+    def clear(self):
+        with self.recordsLock:
+            self.records.clear()
+            self.pending.clear()
+            self.pendingCount = 0
+
+        self.textView.clear()
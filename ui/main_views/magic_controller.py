@@ -1,16 +1,41 @@
 from pprint import pformat
 from ui import model
+from ui.gdb_worker import GdbWorker
 from main_views import magic_view
 
 class MagicController:
-    def __init__(self, view: magic_view.MagicView, model: model.SGDBModel) -> None:
+    def __init__(self, view: magic_view.MagicView, model: model.SGDBModel, worker: GdbWorker) -> None:
         self.view = view
         self.model = model
+        self.worker = worker
 
         self.view.magicButton.clicked.connect(self.sendCommand)
 
     def sendCommand(self):
         toSend = self.view.magicInput.text()
         print(f"command: {toSend}")
-        response = self.model.gdbMI.sendCmd(toSend)
-        self.view.magicTextArea.setText(pformat(response))
+        self.view.magicButton.setEnabled(False)
+        self.worker.call(self.runCommand, toSend, callback=self.showResponse, errback=self.showError)
+
+    # on the worker thread
+    def runCommand(self, command: str):
+        records = []
+        listener = records.append
+        self.model.gdbMI.addRecordListener(listener)
+        try:
+            response = self.model.gdbMI.sendCmd(command)
+        finally:
+            self.model.gdbMI.removeRecordListener(listener)
+
+        return records + [response]
+
+    def showResponse(self, records: list[dict]):
+        # one record at a time, whatever GDB printed along the way comes first
+        self.view.magicTextArea.clear()
+        for record in records:
+            self.view.magicTextArea.append(pformat(record))
+        self.view.magicButton.setEnabled(True)
+
+    def showError(self, error: Exception):
+        self.view.magicTextArea.setText(str(error))
+        self.view.magicButton.setEnabled(True)
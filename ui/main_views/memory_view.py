@@ -0,0 +1,228 @@
+from PySide6 import QtWidgets
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from PySide6.QtGui import QFontDatabase
+
+from backend.memory import MemoryManager
+from ui.gdb_worker import GdbWorker
+
+# printable ASCII stays, everything else becomes a dot
+ASCII_TABLE = bytes(b if 0x20 <= b < 0x7f else ord(".") for b in range(256))
+
+class MemoryTableModel(QAbstractTableModel):
+    BYTES_PER_ROW = 16
+    # Qt can't count rows up to 2^64, so the model shows a window of the
+    # address space and the view moves it around
+    WINDOW_ROWS = 1 << 20
+    # rows fetched above and below the visible ones
+    PREFETCH_ROWS = 64
+    ADDRESS_SPACE = 1 << 64
+
+    COLUMNS = ["Address", "Hex", "ASCII"]
+
+    def __init__(self, memMgr: MemoryManager | None = None, worker: GdbWorker | None = None):
+        super().__init__()
+        self.memMgr = memMgr
+        # reads run on the GDB worker, never on the GUI thread
+        self.worker = worker
+        self.baseAddress = 0
+
+        # the only memory we keep: what's on screen plus the prefetch margin.
+        # bufferStart/bufferEnd is what we asked for, buffer can be shorter
+        # if GDB couldn't read all of it
+        self.buffer = b""
+        self.bufferStart = 0
+        self.bufferEnd = 0
+
+        self.visibleRows = (0, 0)
+        # one read at a time. bumped by refresh() so reads from before it get dropped
+        self.fetching = False
+        self.fetchAgain = False
+        self.fetchGeneration = 0
+
+        self.fetchTimer = QTimer()
+        self.fetchTimer.setSingleShot(True)
+        self.fetchTimer.setInterval(0)
+        self.fetchTimer.timeout.connect(self.fetchVisible)
+
+    def setMemoryManager(self, memMgr: MemoryManager, worker: GdbWorker):
+        self.memMgr = memMgr
+        self.worker = worker
+        self.refresh()
+
+    def setBaseAddress(self, address: int):
+        self.beginResetModel()
+        self.baseAddress = address - address % self.BYTES_PER_ROW
+        self.endResetModel()
+
+    def rowAddress(self, row: int) -> int:
+        return self.baseAddress + row * self.BYTES_PER_ROW
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if (parent.isValid()):
+            return 0
+
+        return min(self.WINDOW_ROWS, (self.ADDRESS_SPACE - self.baseAddress) // self.BYTES_PER_ROW)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if (parent.isValid()):
+            return 0
+
+        return len(self.COLUMNS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal):
+            return self.COLUMNS[section]
+
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if (role != Qt.ItemDataRole.DisplayRole or not index.isValid()):
+            return None
+
+        address = self.rowAddress(index.row())
+        if (index.column() == 0):
+            return f"{address:016x}"
+
+        if (not self.bufferStart <= address < self.bufferEnd):
+            # not fetched yet, visible rows get fetched as soon as we're idle
+            self.fetchTimer.start()
+            return ""
+
+        offset = address - self.bufferStart
+        chunk = self.buffer[offset:offset + self.BYTES_PER_ROW]
+        missing = self.BYTES_PER_ROW - len(chunk)
+
+        if (index.column() == 1):
+            return " ".join(filter(None, [chunk.hex(" "), " ".join(["??"] * missing)]))
+
+        return chunk.translate(ASCII_TABLE).decode("ascii") + "." * missing
+
+    def setVisibleRows(self, first: int, last: int):
+        self.visibleRows = (first, last)
+
+        start = self.rowAddress(first)
+        end = self.rowAddress(last + 1)
+        if (start < self.bufferStart or end > self.bufferEnd):
+            self.fetchTimer.start()
+
+    def fetchVisible(self):
+        if (self.memMgr is None or self.worker is None):
+            return
+
+        if (self.fetching):
+            self.fetchAgain = True
+            return
+
+        start = self.rowAddress(self.visibleRows[0])
+        end = self.rowAddress(self.visibleRows[1] + 1)
+        if (self.bufferStart <= start and end <= self.bufferEnd):
+            return
+
+        first = max(self.visibleRows[0] - self.PREFETCH_ROWS, 0)
+        last = min(self.visibleRows[1] + self.PREFETCH_ROWS, self.rowCount() - 1)
+        start = self.rowAddress(first)
+        end = self.rowAddress(last + 1)
+        generation = self.fetchGeneration
+
+        self.fetching = True
+        self.worker.call(self.memMgr.readBytes, start, end - start,
+                         callback=lambda data: self.onFetched(generation, start, end, data),
+                         errback=lambda error: self.onFetched(generation, start, start, b""))
+
+    def onFetched(self, generation: int, start: int, end: int, data: bytes):
+        self.fetching = False
+
+        if (generation == self.fetchGeneration):
+            self.buffer = data
+            self.bufferStart = start
+            self.bufferEnd = end
+
+            first = max((start - self.baseAddress) // self.BYTES_PER_ROW, 0)
+            last = min((end - self.baseAddress) // self.BYTES_PER_ROW, self.rowCount()) - 1
+            if (first <= last):
+                self.dataChanged.emit(self.index(first, 1), self.index(last, 2))
+
+        if (self.fetchAgain or generation != self.fetchGeneration):
+            self.fetchAgain = False
+            self.fetchTimer.start()
+
+    # drops what we have, e.g. when the target stopped
+    def refresh(self):
+        self.fetchGeneration += 1
+        self.buffer = b""
+        self.bufferStart = self.bufferEnd = 0
+        self.fetchTimer.start()
+
+class MemoryHexView(QtWidgets.QWidget):
+    def __init__(self, /, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+
+        self.model = MemoryTableModel()
+
+        self.addressInput = QtWidgets.QLineEdit()
+        self.addressInput.setPlaceholderText("Go to address...")
+        self.addressInput.returnPressed.connect(self.goToInput)
+
+        self.tableView = QtWidgets.QTableView()
+        self.tableView.setModel(self.model)
+        self.tableView.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.tableView.setWordWrap(False)
+        self.tableView.setShowGrid(False)
+        self.tableView.verticalHeader().hide()
+        # fixed row heights, otherwise Qt would measure a million rows
+        self.tableView.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.tableView.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+        self.tableView.horizontalHeader().setStretchLastSection(True)
+        self.tableView.verticalScrollBar().valueChanged.connect(self.onScroll)
+
+        self.mainLayout = QtWidgets.QVBoxLayout(self)
+        self.mainLayout.addWidget(self.addressInput)
+        self.mainLayout.addWidget(self.tableView)
+
+    def setMemoryManager(self, memMgr: MemoryManager, worker: GdbWorker):
+        self.model.setMemoryManager(memMgr, worker)
+
+    def refresh(self):
+        self.model.refresh()
+
+    def goToInput(self):
+        try:
+            self.goTo(int(self.addressInput.text(), 0))
+        except ValueError:
+            self.addressInput.selectAll()
+
+    # the window base that puts address in the middle, as far as the edges allow
+    def baseFor(self, address: int) -> int:
+        half = self.model.WINDOW_ROWS // 2 * self.model.BYTES_PER_ROW
+        lastBase = self.model.ADDRESS_SPACE - self.model.WINDOW_ROWS * self.model.BYTES_PER_ROW
+
+        return min(max(address - half, 0), lastBase)
+
+    def goTo(self, address: int):
+        address %= self.model.ADDRESS_SPACE
+        self.model.setBaseAddress(self.baseFor(address))
+        row = (address - self.model.baseAddress) // self.model.BYTES_PER_ROW
+        self.tableView.scrollTo(self.model.index(row, 0), QtWidgets.QAbstractItemView.ScrollHint.PositionAtTop)
+        self.onScroll()
+
+    def onScroll(self):
+        first = self.tableView.rowAt(0)
+        last = self.tableView.rowAt(self.tableView.viewport().height() - 1)
+        if (first < 0):
+            return
+        if (last < 0):
+            last = self.model.rowCount() - 1
+
+        # getting close to the edges of the window, move it so there's more to scroll
+        quarter = self.model.WINDOW_ROWS // 4
+        firstAddress = self.model.rowAddress(first)
+        if ((first < quarter or last > self.model.WINDOW_ROWS - quarter) and
+                self.baseFor(firstAddress) != self.model.baseAddress):
+            self.goTo(firstAddress)
+            return
+
+        self.model.setVisibleRows(first, last)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.onScroll()
@@ -0,0 +1,77 @@
+from PySide6 import QtWidgets
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QColor, QFontDatabase
+
+from ui.model_types import Register
+
+CHANGED_COLOR = QColor(255, 80, 80, 60)
+
+# the model's registers, in GDB's order. a stop only touches the rows whose
+# value changed, plus the ones that were highlighted and aren't anymore
+class RegistersTableModel(QAbstractTableModel):
+    COLUMNS = ["Register", "Value"]
+
+    def __init__(self):
+        super().__init__()
+        self.registers: list[Register] = []
+        # register number -> row
+        self.rows: dict[int, int] = {}
+        self.changed: frozenset[int] = frozenset()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.registers)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal):
+            return self.COLUMNS[section]
+
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if (not index.isValid()):
+            return None
+
+        register = self.registers[index.row()]
+        if (role == Qt.ItemDataRole.DisplayRole):
+            return register.name if index.column() == 0 else register.value
+        if (role == Qt.ItemDataRole.BackgroundRole and register.number in self.changed):
+            return CHANGED_COLOR
+
+        return None
+
+    def setRegisters(self, registers: tuple[Register, ...], changed: frozenset[int]):
+        # GDB lists unnamed numbers for the gaps in its register file
+        registers = [r for r in registers if r.name]
+
+        if ([r.number for r in registers] != [r.number for r in self.registers]):
+            # another architecture (or the first stop), the rows themselves changed
+            self.beginResetModel()
+            self.registers = registers
+            self.rows = {r.number: row for row, r in enumerate(registers)}
+            self.changed = changed
+            self.endResetModel()
+            return
+
+        dirty = [self.rows[n] for n in changed | self.changed if n in self.rows]
+        self.registers = registers
+        self.changed = changed
+
+        for row in dirty:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, 1))
+
+class RegistersView(QtWidgets.QTableView):
+    def __init__(self, /, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+
+        self.registersModel = RegistersTableModel()
+        self.setModel(self.registersModel)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setWordWrap(False)
+        self.setShowGrid(False)
+        self.verticalHeader().hide()
+        # fixed row heights, so Qt doesn't measure every row on every stop
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.horizontalHeader().setStretchLastSection(True)
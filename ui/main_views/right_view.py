@@ -1,6 +1,13 @@
 from PySide6 import QtWidgets
 from PySide6.QtCore import Qt
 
+from ui.gdb_worker import GdbWorker
+from ui.model import SGDBModel, StopSnapshot
+from ui.main_views.registers_view import RegistersView
+from ui.main_views.stack_view import StackView
+from ui.main_views.variables_view import VariablesView
+from ui.main_views.watches_view import WatchesView
+
 class RightView(QtWidgets.QMdiSubWindow):
     def __init__(self, /, parent: QtWidgets.QWidget | None):
         super().__init__(parent)
@@ -10,7 +17,25 @@ class RightView(QtWidgets.QMdiSubWindow):
 
         self.tabView = QtWidgets.QTabWidget()
 
-        self.tabView.addTab(QtWidgets.QWidget(), "Variables")
-        self.tabView.addTab(QtWidgets.QWidget(), "Registers")
+        self.variablesView = VariablesView()
+        self.registersView = RegistersView()
+        self.stackView = StackView()
+        self.watchesView = WatchesView()
+
+        self.tabView.addTab(self.variablesView, "Variables")
+        self.tabView.addTab(self.registersView, "Registers")
+        self.tabView.addTab(self.stackView, "Stack")
+        self.tabView.addTab(self.watchesView, "Watches")
 
         self.setWidget(self.tabView)
+
+    def setModel(self, model: SGDBModel, worker: GdbWorker):
+        self.variablesView.variablesModel.setModel(model, worker)
+        self.stackView.setModel(model, worker)
+
+    def showSnapshot(self, snapshot: StopSnapshot):
+        self.variablesView.variablesModel.setVariables(snapshot.variables, snapshot.changedVariables,
+                                                       snapshot.variableUpdates)
+        self.registersView.registersModel.setRegisters(snapshot.registers, snapshot.changedRegisters)
+        self.stackView.showSnapshot(snapshot)
+        self.watchesView.watchesModel.setWatches(snapshot.watches)
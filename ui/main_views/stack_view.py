@@ -0,0 +1,156 @@
+from PySide6 import QtWidgets
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+from PySide6.QtGui import QFontDatabase
+
+from backend.stack import StackManager
+from ui.gdb_worker import GdbWorker
+from ui.model import SGDBModel, StopSnapshot
+from ui.model_types import Frame
+
+# one thread's call stack. starts with the top frames, the deeper ones get
+# asked to GDB (on the worker) when the view scrolls down to them
+class StackTableModel(QAbstractTableModel):
+    COLUMNS = ["Level", "Function", "Location", "Address"]
+    # frames asked for at a time when scrolling down
+    PAGE_FRAMES = 32
+
+    def __init__(self):
+        super().__init__()
+        self.model: SGDBModel | None = None
+        self.worker: GdbWorker | None = None
+
+        self.thread = ""
+        self.frames: tuple[Frame, ...] = ()
+        self.complete = True
+        self.fetching = False
+        # bumped on every setFrames, frames fetched for an older stack get dropped
+        self.generation = 0
+
+    def setModel(self, model: SGDBModel, worker: GdbWorker):
+        self.model = model
+        self.worker = worker
+        self.setFrames("", (), True)
+
+    def setFrames(self, thread: str, frames: tuple[Frame, ...], complete: bool):
+        self.beginResetModel()
+        self.generation += 1
+        self.thread = thread
+        self.frames = frames
+        self.complete = complete
+        self.fetching = False
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.frames)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal):
+            return self.COLUMNS[section]
+
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if (role != Qt.ItemDataRole.DisplayRole or not index.isValid()):
+            return None
+
+        frame = self.frames[index.row()]
+        column = index.column()
+        if (column == 0):
+            return str(frame.level)
+        if (column == 1):
+            args = ", ".join(f"{name}={value}" if value else name for name, value in frame.args)
+            return f"{frame.function}({args})" if frame.function else "??"
+        if (column == 2):
+            return f"{frame.file}:{frame.line}" if frame.file else ""
+
+        return f"{frame.address:#x}" if frame.address is not None else ""
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and not self.complete and not self.fetching and self.worker is not None
+
+    def fetchMore(self, parent: QModelIndex):
+        self.fetching = True
+        generation = self.generation
+
+        self.worker.call(self.model.stackFrames, self.thread, len(self.frames) + self.PAGE_FRAMES,
+                         callback=lambda result: self.onFetched(generation, *result),
+                         errback=lambda error: self.onFetched(generation, self.frames, True))
+
+    def onFetched(self, generation: int, frames: tuple[Frame, ...], complete: bool):
+        if (generation != self.generation):
+            return
+
+        self.fetching = False
+        self.complete = complete
+        if (len(frames) > len(self.frames)):
+            self.beginInsertRows(QModelIndex(), len(self.frames), len(frames) - 1)
+            self.frames = frames
+            self.endInsertRows()
+
+class StackView(QtWidgets.QWidget):
+    # a frame got double clicked
+    frameActivated = Signal(object)
+
+    def __init__(self, /, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+
+        self.model: SGDBModel | None = None
+        self.worker: GdbWorker | None = None
+        self.snapshot: StopSnapshot | None = None
+
+        self.threadBox = QtWidgets.QComboBox()
+        self.threadBox.activated.connect(self.onThreadChosen)
+
+        self.stackModel = StackTableModel()
+        self.tableView = QtWidgets.QTableView()
+        self.tableView.setModel(self.stackModel)
+        self.tableView.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.tableView.setWordWrap(False)
+        self.tableView.setShowGrid(False)
+        self.tableView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tableView.verticalHeader().hide()
+        self.tableView.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.tableView.horizontalHeader().setStretchLastSection(True)
+        self.tableView.doubleClicked.connect(lambda index: self.frameActivated.emit(self.stackModel.frames[index.row()]))
+
+        self.mainLayout = QtWidgets.QVBoxLayout(self)
+        self.mainLayout.addWidget(self.threadBox)
+        self.mainLayout.addWidget(self.tableView)
+
+    def setModel(self, model: SGDBModel, worker: GdbWorker):
+        self.model = model
+        self.worker = worker
+        self.stackModel.setModel(model, worker)
+
+    def showSnapshot(self, snapshot: StopSnapshot):
+        self.snapshot = snapshot
+        threads = snapshot.threads
+
+        self.threadBox.clear()
+        for thread in threads.threads:
+            where = thread.frame.function if thread.frame is not None else thread.state
+            self.threadBox.addItem(f"{thread.id}: {thread.targetId} ({where})", thread.id)
+        self.threadBox.setCurrentIndex(max(self.threadBox.findData(threads.currentThread), 0))
+
+        self.stackModel.setFrames(threads.currentThread, snapshot.stack,
+                                  len(snapshot.stack) < StackManager.TOP_FRAMES)
+
+    def onThreadChosen(self, row: int):
+        thread = self.threadBox.itemData(row)
+        if (self.snapshot is not None and thread == self.snapshot.threads.currentThread):
+            self.stackModel.setFrames(thread, self.snapshot.stack, len(self.snapshot.stack) < StackManager.TOP_FRAMES)
+            return
+
+        if (self.worker is None):
+            return
+
+        # prefetched after the stop, this comes straight from the cache
+        self.worker.call(self.model.stackFrames, thread, StackManager.TOP_FRAMES,
+                         callback=lambda result: self.onThreadFrames(thread, *result))
+
+    def onThreadFrames(self, thread: str, frames: tuple[Frame, ...], complete: bool):
+        if (self.threadBox.currentData() == thread):
+            self.stackModel.setFrames(thread, frames, complete)
@@ -0,0 +1,88 @@
+from loguru import logger
+from PySide6 import QtWidgets
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QFontDatabase
+from typing_extensions import Callable
+
+from backend.stats import GdbStats
+
+# what the commands to one target's GDB cost, refreshed while it's open
+class StatsDialog(QtWidgets.QDialog):
+    REFRESH_MS = 1000
+
+    def __init__(self, stats: GdbStats, title: str, /, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+        self.stats = stats
+
+        self.setWindowTitle(f"GDB Statistics - {title}")
+        self.resize(800, 500)
+
+        self.textView = QtWidgets.QPlainTextEdit()
+        self.textView.setReadOnly(True)
+        self.textView.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        self.textView.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+
+        self.traceBox = QtWidgets.QCheckBox("Record trace")
+        self.traceBox.setChecked(stats.tracing)
+        self.traceBox.toggled.connect(stats.setTracing)
+
+        self.resetButton = QtWidgets.QPushButton("Reset")
+        self.resetButton.clicked.connect(self.reset)
+        self.exportButton = QtWidgets.QPushButton("Export JSON...")
+        self.exportButton.clicked.connect(self.exportJSON)
+        self.traceButton = QtWidgets.QPushButton("Export Trace...")
+        self.traceButton.clicked.connect(self.exportTrace)
+
+        self.buttonsLayout = QtWidgets.QHBoxLayout()
+        self.buttonsLayout.addWidget(self.traceBox)
+        self.buttonsLayout.addStretch()
+        self.buttonsLayout.addWidget(self.resetButton)
+        self.buttonsLayout.addWidget(self.exportButton)
+        self.buttonsLayout.addWidget(self.traceButton)
+
+        self.mainLayout = QtWidgets.QVBoxLayout(self)
+        self.mainLayout.addWidget(self.textView)
+        self.mainLayout.addLayout(self.buttonsLayout)
+
+        # only ticks while the dialog is showing
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setInterval(self.REFRESH_MS)
+        self.refreshTimer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refreshTimer.start()
+        super().showEvent(event)
+
+    # closing, Esc and the like all end up here
+    def hideEvent(self, event):
+        self.refreshTimer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        scrollBar = self.textView.verticalScrollBar()
+        position = scrollBar.value()
+        self.textView.setPlainText(self.stats.dump())
+        scrollBar.setValue(position)
+
+    def reset(self):
+        self.stats.reset()
+        self.refresh()
+
+    def exportJSON(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Statistics", "gdb_stats.json", "JSON (*.json)")
+        if (path):
+            self.export("Export Statistics", self.stats.exportJSON, path)
+
+    # Chrome's trace format, opens in chrome://tracing or ui.perfetto.dev
+    def exportTrace(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Trace", "gdb_trace.json", "Trace (*.json)")
+        if (path):
+            self.export("Export Trace", self.stats.exportTrace, path)
+
+    def export(self, title: str, write: Callable[[str], None], path: str):
+        try:
+            write(path)
+        except OSError as e:
+            logger.error(f"Couldn't write {path}: {e}")
+            QtWidgets.QMessageBox.critical(self, title, f"Couldn't write {path}:\n{e}")
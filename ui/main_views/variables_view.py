@@ -0,0 +1,183 @@
+from PySide6 import QtWidgets
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
+from PySide6.QtGui import QFontDatabase
+
+from ui.gdb_worker import GdbWorker
+from ui.model import SGDBModel
+from ui.model_types import Variable
+from ui.main_views.registers_view import CHANGED_COLOR
+
+class VariableNode:
+    __slots__ = ("variable", "parent", "row", "children", "fetching")
+
+    def __init__(self, variable: Variable | None, parent: "VariableNode | None", row: int):
+        self.variable = variable
+        self.parent = parent
+        self.row = row
+        # None until the view opens it and GDB listed them
+        self.children: list[VariableNode] | None = None
+        self.fetching = False
+
+# the locals as a tree. children are asked to GDB (on the worker) only when
+# the view opens a row, and a stop only touches the rows GDB said changed
+class VariablesTreeModel(QAbstractItemModel):
+    COLUMNS = ["Name", "Value", "Type"]
+
+    def __init__(self):
+        super().__init__()
+        self.model: SGDBModel | None = None
+        self.worker: GdbWorker | None = None
+
+        self.root = VariableNode(None, None, 0)
+        self.root.children = []
+        # variable object name -> node, for every node in the tree
+        self.nodes: dict[str, VariableNode] = {}
+        self.changed: frozenset[str] = frozenset()
+        # bumped on every reset, children fetched for an older tree get dropped
+        self.generation = 0
+
+    def setModel(self, model: SGDBModel, worker: GdbWorker):
+        self.model = model
+        self.worker = worker
+        self.setVariables((), frozenset(), ())
+
+    def node(self, index: QModelIndex) -> VariableNode:
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        children = self.node(parent).children or []
+        if (not 0 <= row < len(children) or not 0 <= column < len(self.COLUMNS)):
+            return QModelIndex()
+
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if (not index.isValid()):
+            return QModelIndex()
+
+        parent = index.internalPointer().parent
+        if (parent is None or parent is self.root):
+            return QModelIndex()
+
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if (parent.column() > 0):
+            return 0
+
+        return len(self.node(parent).children or [])
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        node = self.node(parent)
+        if (node is self.root):
+            return bool(node.children)
+
+        return node.variable.numChildren > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        node = self.node(parent)
+        return (node is not self.root and node.children is None and not node.fetching and
+                node.variable.numChildren > 0 and self.worker is not None)
+
+    def fetchMore(self, parent: QModelIndex):
+        node = self.node(parent)
+        node.fetching = True
+        generation = self.generation
+
+        self.worker.call(self.model.expandVariable, node.variable.varObject,
+                         callback=lambda children: self.onFetched(generation, node, children),
+                         errback=lambda error: self.onFetched(generation, node, ()))
+
+    def onFetched(self, generation: int, node: VariableNode, children: tuple[Variable, ...]):
+        node.fetching = False
+        if (generation != self.generation or node.children is not None):
+            return
+
+        if (not children):
+            node.children = []
+            return
+
+        self.beginInsertRows(self.createIndex(node.row, 0, node), 0, len(children) - 1)
+        node.children = [VariableNode(child, node, row) for row, child in enumerate(children)]
+        for child in node.children:
+            self.nodes[child.variable.varObject] = child
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal):
+            return self.COLUMNS[section]
+
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if (not index.isValid()):
+            return None
+
+        variable = index.internalPointer().variable
+        if (role == Qt.ItemDataRole.DisplayRole):
+            return (variable.name, variable.value, variable.type)[index.column()]
+        if (role == Qt.ItemDataRole.BackgroundRole and variable.varObject in self.changed):
+            return CHANGED_COLOR
+
+        return None
+
+    def forget(self, node: VariableNode):
+        for child in node.children or []:
+            self.nodes.pop(child.variable.varObject, None)
+            self.forget(child)
+
+    # GDB threw the children away, they get listed again when the row is opened
+    def dropChildren(self, node: VariableNode):
+        if (not node.children):
+            node.children = None
+            return
+
+        self.beginRemoveRows(self.createIndex(node.row, 0, node), 0, len(node.children) - 1)
+        self.forget(node)
+        node.children = None
+        self.endRemoveRows()
+
+    # a stop: locals, the variable objects that changed and their new values
+    def setVariables(self, variables: tuple[Variable, ...], changed: frozenset[str], updates: tuple[Variable, ...]):
+        top = [node.variable.varObject for node in self.root.children]
+        if ([v.varObject for v in variables] != top):
+            # another function (or locals came and went), the rows themselves changed
+            self.beginResetModel()
+            self.generation += 1
+            self.root.children = [VariableNode(variable, self.root, row) for row, variable in enumerate(variables)]
+            self.nodes = {node.variable.varObject: node for node in self.root.children}
+            self.changed = changed
+            self.endResetModel()
+            return
+
+        previous = self.changed
+        self.changed = changed
+
+        for variable in updates:
+            node = self.nodes.get(variable.varObject)
+            if (node is None):
+                continue
+
+            old = node.variable
+            node.variable = variable
+            if (node.children is not None and (old.type != variable.type or old.numChildren != variable.numChildren)):
+                self.dropChildren(node)
+
+        # the changed rows and the ones that were highlighted and aren't anymore
+        for name in changed | previous:
+            node = self.nodes.get(name)
+            if (node is not None):
+                self.dataChanged.emit(self.createIndex(node.row, 0, node), self.createIndex(node.row, 2, node))
+
+class VariablesView(QtWidgets.QTreeView):
+    def __init__(self, /, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+
+        self.variablesModel = VariablesTreeModel()
+        self.setModel(self.variablesModel)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setUniformRowHeights(True)
+        self.setAlternatingRowColors(True)
@@ -0,0 +1,70 @@
+from PySide6 import QtWidgets
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QFontDatabase
+
+from ui.main_views.registers_view import CHANGED_COLOR
+
+# the session's watch expressions and what they were at the last stop. the
+# ones whose value changed since the stop before get highlighted
+class WatchesTableModel(QAbstractTableModel):
+    COLUMNS = ["Expression", "Value"]
+    UNAVAILABLE = "<unavailable>"
+
+    def __init__(self):
+        super().__init__()
+        self.watches: tuple[tuple[str, str | None], ...] = ()
+        # rows whose value changed at the last stop
+        self.changed: frozenset[int] = frozenset()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.watches)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal):
+            return self.COLUMNS[section]
+
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if (not index.isValid()):
+            return None
+
+        expression, value = self.watches[index.row()]
+        if (role == Qt.ItemDataRole.DisplayRole):
+            return expression if index.column() == 0 else (self.UNAVAILABLE if value is None else value)
+        if (role == Qt.ItemDataRole.BackgroundRole and index.row() in self.changed):
+            return CHANGED_COLOR
+
+        return None
+
+    def setWatches(self, watches: tuple[tuple[str, str | None], ...]):
+        if ([e for e, _ in watches] != [e for e, _ in self.watches]):
+            self.beginResetModel()
+            self.watches = watches
+            self.changed = frozenset()
+            self.endResetModel()
+            return
+
+        changed = frozenset(row for row, (old, new) in enumerate(zip(self.watches, watches)) if old[1] != new[1])
+        dirty = changed | self.changed
+        self.watches = watches
+        self.changed = changed
+
+        for row in dirty:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, 1))
+
+class WatchesView(QtWidgets.QTableView):
+    def __init__(self, /, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+
+        self.watchesModel = WatchesTableModel()
+        self.setModel(self.watchesModel)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setWordWrap(False)
+        self.setShowGrid(False)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.horizontalHeader().setStretchLastSection(True)
@@ -1,13 +1,59 @@
-from backend import code, memory, symbols, cpu, gdbmi
+import os
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from loguru import logger
+
+from backend import code, memory, symbols, cpu, gdbmi, source, stack
+from backend.elf import binaryIdentity
+from ui.session import Session
+from ui.model_types import Breakpoint, Frame, RecordPool, Register, Thread, ThreadInfo, Variable
+
+# everything the UI shows about a stopped target, fetched in one go
+@dataclass(frozen=True, slots=True)
+class StopSnapshot:
+    threads: ThreadInfo
+    registers: tuple[Register, ...]
+    changedRegisters: frozenset[int]
+    variables: tuple[Variable, ...]
+    changedVariables: frozenset[str]
+    # new values of the changed variable objects, expanded children included
+    variableUpdates: tuple[Variable, ...]
+    breakpoints: tuple[Breakpoint, ...]
+    # the current thread's top frames, more through stackFrames()
+    stack: tuple[Frame, ...]
+    disassembly: tuple[dict, ...]
+    # (expression, value) of the watches, value is None if GDB couldn't evaluate it
+    watches: tuple[tuple[str, str | None], ...]
 
 class SGDBModel:
-    currentThread: int
+    currentThread: str
     currentBreakpoint: str
 
-    registers: dict
-    breakpoints: list[dict]
+    registers: dict[int, Register]
+    registerNames: list[str]
+    # numbers of the registers that changed value at the last refresh
+    changedRegisters: set[int]
+
+    breakpoints: list[Breakpoint]
+
+    variables: list[Variable]
+    # expressions the user wants to keep an eye on
+    watches: list[str]
+    # GDB names of the variable objects that changed at the last refresh
+    changedVariables: set[str]
 
-    variables: list[dict]
+    # build-id (or equivalent) of the program we loaded
+    programIdentity: str | None
+
+    # True once attachSession() is done, until then the live breakpoint
+    # table isn't the session's
+    sessionAttached: bool
+    # session breakpoints GDB refused, kept so saving doesn't lose them
+    rejectedBreakpoints: list[str]
+
+    # how many bytes after $pc get disassembled on every stop
+    STOP_DISASSEMBLY_BYTES = 64
 
     def __init__(self, gdbMI: gdbmi.GdbMI) -> None:
         self.gdbMI = gdbMI
@@ -16,23 +62,302 @@ class SGDBModel:
         self.symMgr = symbols.SymbolsManager(gdbMI)
         self.memMgr = memory.MemoryManager(gdbMI)
         self.cpuMgr = cpu.CPUManager(gdbMI)
+        self.sourceMgr = source.SourceManager()
+        self.stackMgr = stack.StackManager(gdbMI)
+
+        # a memory write can change what any expression evaluates to, and the code it wrote over
+        self.memMgr.writeListeners.append(lambda address, count: self.symMgr.invalidateEvaluations())
+        self.memMgr.writeListeners.append(self.codeMgr.invalidateDisassembly)
+
+        self.registers = {}
+        self.registerNames = []
+        self.changedRegisters = set()
+        self.breakpoints = []
+        self.variables = []
+        self.changedVariables = set()
+        self.watches = []
+        self.programIdentity = None
+        self.sessionAttached = False
+        self.rejectedBreakpoints = []
+
+        self.threadPool = RecordPool()
+        self.breakpointPool = RecordPool()
+        self.variablePool = RecordPool()
+        self.framePool = RecordPool()
+
+    # everything we cache about the program itself: symbols and disassembly
+    def loadProgram(self, programPath: str):
+        self.programIdentity = binaryIdentity(programPath)
+        self.codeMgr.setBinary(programPath, persistent=True)
+        self.symMgr.loadSymbols(programPath)
+
+    # a frame's source file, read and its lines indexed, so the code view
+    # only has to lay out the lines it shows. on the worker
+    def loadSource(self, fullname: str, file: str = "") -> source.SourceDocument | None:
+        document = self.sourceMgr.openFrame(fullname, file)
+        if (document is not None):
+            document.offsets()
+
+        return document
+
+    # what's worth keeping for the next session, before GDB goes away
+    def saveCaches(self):
+        self.codeMgr.saveDisassembly()
+
+    # the part of a session that doesn't need the target, so it can run
+    # while the pre-run commands are still building it
+    def loadSession(self, session: Session) -> list[dict]:
+        self.watches = list(session.watches)
+        if (not session.programPath or not os.path.exists(session.programPath)):
+            return []
+
+        responses = self.waitForAll([self.codeMgr.loadExecutable(session.programPath, wait=False)])
+        self.loadProgram(session.programPath)
+
+        return responses
+
+    # GDB script (usually connects to the target) and breakpoints, all in one
+    # write, after the pre-run commands are done. the program gets loaded again
+    # if they rebuilt it
+    def attachSession(self, session: Session) -> list[dict]:
+        reload = bool(session.programPath) and binaryIdentity(session.programPath) != self.programIdentity
+
+        requests = []
+        with self.gdbMI.batch():
+            if (reload):
+                requests.append(self.codeMgr.loadExecutable(session.programPath, wait=False))
+            if (session.gdbScriptPath):
+                requests.append(self.codeMgr.sourceScript(session.gdbScriptPath, wait=False))
+            breakpoints = [self.codeMgr.setBreakpoint(position, wait=False) for position in session.breakpoints]
+
+        responses = self.waitForAll(requests + breakpoints)
+        if (reload):
+            self.loadProgram(session.programPath)
+
+        self.rejectedBreakpoints = [position for position, response in zip(session.breakpoints, responses[len(requests):])
+                                    if response.get("message") != "done"]
+        self.sessionAttached = True
+
+        return responses
+
+    def waitForAll(self, requests: list[Future]) -> list[dict]:
+        responses = [self.waitFor(request) for request in requests]
+        for response in responses:
+            if (response.get("message") != "done"):
+                logger.warning(f"Session restore: {response.get('payload')}")
+
+        return responses
+
+    # breakpoints the way -break-insert can make them again. saved is what
+    # the session had: all of it until the session is attached, after that
+    # only the ones GDB refused
+    def sessionBreakpoints(self, saved: list[str]) -> list[str]:
+        positions = [bkpt.get("original-location") or f"*{bkpt['addr']}"
+                     for bkpt in self.codeMgr.breakpointList() if "original-location" in bkpt or "addr" in bkpt]
+        kept = self.rejectedBreakpoints if self.sessionAttached else saved
+
+        return positions + [position for position in kept if position not in positions]
+
+    # call inside a batch() block
+    def requestWatches(self) -> list[tuple[str, Future]]:
+        return [(expression, self.symMgr.evaluate(expression)) for expression in self.watches]
+
+    def collectWatches(self, requests: list[tuple[str, Future]]) -> tuple[tuple[str, str | None], ...]:
+        values = []
+        for expression, request in requests:
+            response = self.waitFor(request)
+            values.append((expression, response["payload"].get("value") if response.get("message") == "done" else None))
+
+        return tuple(values)
+
+    # (expression, value), value is None if GDB couldn't evaluate it
+    def evaluateWatches(self) -> tuple[tuple[str, str | None], ...]:
+        with self.gdbMI.batch():
+            requests = self.requestWatches()
+
+        return self.collectWatches(requests)
+
+    def waitFor(self, future: Future) -> dict:
+        return self.gdbMI.waitFor(future)
+
+    # payload is -thread-info's, or what CPUManager keeps from the async records
+    def parseThreadInfo(self, payload: dict) -> ThreadInfo:
+        threadsInfo = ThreadInfo(
+            currentThread=payload.get("current-thread-id", ""),
+            threads=tuple(Thread.fromMI(thread, self.threadPool) for thread in payload.get("threads", []))
+        )
+        self.threadPool.swap()
+
+        self.currentThread = threadsInfo.currentThread
+
+        return threadsInfo
+
+    # from the table CodeManager keeps, no need to ask GDB
+    def currentBreakpoints(self) -> list[Breakpoint]:
+        breakpoints = [Breakpoint.fromMI(bkpt, self.breakpointPool) for bkpt in self.codeMgr.breakpointList()]
+        self.breakpointPool.swap()
+
+        return breakpoints
+
+    # the locals' variable objects as records, for the snapshot
+    def toVariable(self, varObject: symbols.VarObject) -> Variable:
+        return Variable.fromMI({"name": varObject.expression, "value": varObject.value, "type": varObject.type,
+                                "varobj": varObject.name, "numchild": str(varObject.numChildren)}, self.variablePool)
+
+    def localVariables(self) -> list[Variable]:
+        variables = [self.toVariable(var) for var in self.symMgr.localVars.values()]
+        self.variablePool.swap()
+
+        return variables
+
+    def variableUpdates(self, changed: set[str]) -> tuple[Variable, ...]:
+        return tuple(self.toVariable(self.symMgr.varObjects[name]) for name in changed if name in self.symMgr.varObjects)
+
+    # children of a local (or of a child) are only asked to GDB when the view opens it
+    def expandVariable(self, name: str) -> tuple[Variable, ...]:
+        if (name not in self.symMgr.varObjects):
+            return ()
+
+        return tuple(self.toVariable(child) for child in self.symMgr.expandVarObject(name))
+
+    def toFrames(self, frames: list[dict]) -> tuple[Frame, ...]:
+        return tuple(Frame.fromMI(frame, self.framePool) for frame in frames)
+
+    # the first count frames of a thread, the bool is True if that's all of them
+    def stackFrames(self, thread: str, count: int) -> tuple[tuple[Frame, ...], bool]:
+        frames, complete = self.stackMgr.getFrames(thread, count)
+        return self.toFrames(frames), complete
+
+    # top frames of every stopped thread we don't have yet, in one write, so
+    # switching threads afterwards doesn't wait for GDB
+    def prefetchStacks(self, threadsInfo: ThreadInfo):
+        high = self.stackMgr.TOP_FRAMES - 1
+        threads = [t.id for t in threadsInfo.threads if t.frame is not None and self.stackMgr.cachedFrames(t.id) is None]
+
+        with self.gdbMI.batch():
+            requests = [(thread, self.stackMgr.requestFrames(thread, 0, high)) for thread in threads]
+
+        for thread, request in requests:
+            self.stackMgr.collectFrames(thread, 0, high, request)
 
     def getThreadInfo(self):
-        responses = self.cpuMgr.getThreadInfo()
-        threadsResponse = self.cpuMgr.selectResponse(responses, ("token", self.cpuMgr.token()))
+        return self.parseThreadInfo(self.cpuMgr.refreshThreads())
+
+    # gets the list called `key` out of a result record, empty if GDB said no
+    def payloadList(self, response: dict, key: str) -> tuple:
+        if (response.get("message") != "done"):
+            logger.warning(f"Couldn't get {key}: {response.get('payload')}")
+            return ()
+
+        return tuple(response["payload"].get(key, []))
+
+    # stores new register values, returns the numbers of the ones that changed
+    def updateRegisters(self, valuesResponse: dict) -> set[int]:
+        changed = set()
+
+        for register in self.payloadList(valuesResponse, "register-values"):
+            number = int(register["number"])
+            old = self.registers.get(number)
+            if (old is not None and old.value == register["value"]):
+                continue
+
+            # replaced, never modified, so older snapshots keep their values
+            self.registers[number] = Register(
+                number=number,
+                name=self.registerNames[number] if number < len(self.registerNames) else "",
+                value=register["value"]
+            )
+            changed.add(number)
+
+        return changed
+
+    # names and values get fetched only the first time, after that only the
+    # registers GDB reports as changed. call inside a batch() block
+    def requestRegisters(self) -> dict[str, Future]:
+        if (not self.registerNames):
+            return {
+                "names": self.cpuMgr.getRegisterNames(wait=False),
+                "values": self.cpuMgr.getRegisterValues(wait=False),
+                # this sets GDB's baseline for the next changed registers list
+                "changed": self.cpuMgr.showUpdatedRegisters(wait=False)
+            }
+
+        return {"changed": self.cpuMgr.showUpdatedRegisters(wait=False)}
+
+    def collectRegisters(self, requests: dict[str, Future]) -> set[int]:
+        if ("names" in requests):
+            self.registerNames = list(self.payloadList(self.waitFor(requests["names"]), "register-names"))
+            self.registers = {}
+            self.updateRegisters(self.waitFor(requests["values"]))
+            self.waitFor(requests["changed"])
+            self.changedRegisters = set()
+
+            return self.changedRegisters
+
+        changed = [int(n) for n in self.payloadList(self.waitFor(requests["changed"]), "changed-registers")]
+        if (changed):
+            self.changedRegisters = self.updateRegisters(self.cpuMgr.getRegisterValues(changed))
+        else:
+            self.changedRegisters = set()
+
+        return self.changedRegisters
+
+    def refreshRegisters(self) -> set[int]:
+        with self.gdbMI.batch():
+            requests = self.requestRegisters()
+
+        return self.collectRegisters(requests)
+
+    # pc comes from the *stopped record, when we have it the disassembly
+    # comes from the cache instead of being asked for again
+    def refreshOnStop(self, pc: int | None = None) -> StopSnapshot:
+        loadBreakpoints = not self.codeMgr.breakpointsLoaded
+
+        # all the commands leave in one write, then we wait for the replies together
+        with self.gdbMI.batch():
+            # only the threads the async records say changed
+            threads = self.cpuMgr.requestThreads()
+            # the current thread is the one that stopped, its stack always changed
+            frames = self.stackMgr.requestFrames(None, 0, self.stackMgr.TOP_FRAMES - 1)
+            registers = self.requestRegisters()
+            variables = self.symMgr.requestLocals()
+            watches = self.requestWatches()
+            # only the first time, e.g. for the ones a GDB script made
+            if (loadBreakpoints):
+                breakpoints = self.codeMgr.getBreakpoints(wait=False)
+            if (pc is None):
+                disassembly = self.codeMgr.disassemble("$pc", self.STOP_DISASSEMBLY_BYTES, wait=False)
+
+        threadsInfo = self.parseThreadInfo(self.cpuMgr.collectThreads(threads))
+        currentFrame = next((t.frame for t in threadsInfo.threads if t.id == threadsInfo.currentThread), None)
+        self.stackMgr.checkThreads({t.id: (t.frame.address, t.frame.function)
+                                    for t in threadsInfo.threads if t.frame is not None})
+        stackFrames = self.stackMgr.collectFrames(threadsInfo.currentThread, 0, self.stackMgr.TOP_FRAMES - 1, frames)
 
-        threadsFrame: dict = {
-            "current_thread": threadsResponse["payload"]["current-thread-id"],
-            "threads": []
-        }
+        if (loadBreakpoints):
+            self.codeMgr.loadBreakpointList(self.waitFor(breakpoints))
+        self.breakpoints = self.currentBreakpoints()
+        self.changedVariables = self.symMgr.collectLocals(variables, currentFrame.function if currentFrame else "")
+        self.variables = self.localVariables()
+        self.collectRegisters(registers)
 
-        for thread in threadsResponse["payload"]["threads"]:
-            threadsFrame["threads"].append({
-                "id": thread["id"],
-                "state": thread["state"],
-                "frame": thread["frame"]
-            })
+        if (pc is None):
+            instructions = self.payloadList(self.waitFor(disassembly), "asm_insns")
+        else:
+            instructions = tuple(self.codeMgr.disassembleCached(pc, self.STOP_DISASSEMBLY_BYTES))
 
-        self.currentThread = threadsFrame["current_thread"]
+        snapshot = StopSnapshot(
+            threads=threadsInfo,
+            registers=tuple(self.registers.values()),
+            changedRegisters=frozenset(self.changedRegisters),
+            variables=tuple(self.variables),
+            changedVariables=frozenset(self.changedVariables),
+            variableUpdates=self.variableUpdates(self.changedVariables),
+            breakpoints=tuple(self.breakpoints),
+            stack=self.toFrames(stackFrames),
+            disassembly=instructions,
+            watches=self.collectWatches(watches),
+        )
+        self.framePool.swap()
 
-        return threadsFrame
+        return snapshot
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing_extensions import Any, Callable
+
+# what the model hands to the views instead of pyGDBMI's dicts. they're
+# small (slots), can't change (frozen), so a snapshot can share them with
+# the one before it
+
+# keeps the records made by the last parse: an identical one gets reused
+# instead of built again, so unchanged records are the same object in
+# consecutive snapshots
+class RecordPool:
+    def __init__(self):
+        self.previous: dict[tuple, Any] = {}
+        self.current: dict[tuple, Any] = {}
+
+    def get(self, key: tuple, make: Callable[[], Any]) -> Any:
+        record = self.current.get(key) or self.previous.get(key)
+        if (record is None):
+            record = make()
+
+        self.current[key] = record
+        return record
+
+    # call after every full parse, records not seen in it get dropped
+    def swap(self):
+        self.previous = self.current
+        self.current = {}
+
+def toInt(value: str | None, base: int = 10) -> int | None:
+    try:
+        return int(value, base) if value is not None else None
+    except ValueError:
+        return None
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    level: int
+    address: int | None
+    function: str
+    file: str
+    fullname: str
+    line: int | None
+    # (name, value) pairs, value is "" for the ones GDB didn't print
+    args: tuple[tuple[str, str], ...] = ()
+
+    @staticmethod
+    def fromMI(frame: dict, pool: RecordPool) -> "Frame":
+        args = tuple((arg.get("name", ""), arg.get("value", "")) for arg in frame.get("args", []) if isinstance(arg, dict))
+        key = ("frame", frame.get("level"), frame.get("addr"), frame.get("func"), frame.get("fullname"), frame.get("line"),
+               args)
+        return pool.get(key, lambda: Frame(
+            level=toInt(frame.get("level")) or 0,
+            address=toInt(frame.get("addr"), 16),
+            function=frame.get("func", ""),
+            file=frame.get("file", ""),
+            fullname=frame.get("fullname", ""),
+            line=toInt(frame.get("line")),
+            args=args
+        ))
+
+@dataclass(frozen=True, slots=True)
+class Thread:
+    id: str
+    targetId: str
+    state: str
+    core: str
+    # None while the thread is running
+    frame: Frame | None
+
+    @staticmethod
+    def fromMI(thread: dict, pool: RecordPool) -> "Thread":
+        frame = Frame.fromMI(thread["frame"], pool) if "frame" in thread else None
+        key = ("thread", thread["id"], thread.get("target-id"), thread.get("state"), thread.get("core"), frame)
+        return pool.get(key, lambda: Thread(
+            id=thread["id"],
+            targetId=thread.get("target-id", ""),
+            state=thread.get("state", ""),
+            core=thread.get("core", ""),
+            frame=frame
+        ))
+
+@dataclass(frozen=True, slots=True)
+class ThreadInfo:
+    currentThread: str
+    threads: tuple[Thread, ...]
+
+@dataclass(frozen=True, slots=True)
+class Register:
+    number: int
+    name: str
+    value: str
+
+@dataclass(frozen=True, slots=True)
+class Breakpoint:
+    number: str
+    type: str
+    enabled: bool
+    address: str
+    function: str
+    file: str
+    line: int | None
+    times: int
+    condition: str
+
+    @staticmethod
+    def fromMI(bkpt: dict, pool: RecordPool) -> "Breakpoint":
+        key = ("bkpt", bkpt.get("number"), bkpt.get("enabled"), bkpt.get("addr"), bkpt.get("fullname"), bkpt.get("line"),
+               bkpt.get("times"), bkpt.get("cond"))
+        return pool.get(key, lambda: Breakpoint(
+            number=bkpt.get("number", ""),
+            type=bkpt.get("type", ""),
+            enabled=bkpt.get("enabled") == "y",
+            address=bkpt.get("addr", ""),
+            function=bkpt.get("func", ""),
+            file=bkpt.get("fullname") or bkpt.get("file", ""),
+            line=toInt(bkpt.get("line")),
+            times=toInt(bkpt.get("times")) or 0,
+            condition=bkpt.get("cond", "")
+        ))
+
+@dataclass(frozen=True, slots=True)
+class Variable:
+    name: str
+    value: str
+    type: str
+    # GDB's variable object behind it, like "var1" or "var1.field"
+    varObject: str = ""
+    numChildren: int = 0
+
+    @staticmethod
+    def fromMI(variable: dict, pool: RecordPool) -> "Variable":
+        key = ("var", variable.get("name"), variable.get("value"), variable.get("type"), variable.get("varobj"),
+               variable.get("numchild"))
+        return pool.get(key, lambda: Variable(
+            name=variable.get("name", ""),
+            value=variable.get("value", ""),
+            type=variable.get("type", ""),
+            varObject=variable.get("varobj", ""),
+            numChildren=toInt(variable.get("numchild")) or 0
+        ))
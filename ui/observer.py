@@ -1,22 +1,103 @@
 from enum import Enum
-from typing_extensions import Callable
+from threading import Lock
+from typing_extensions import Any, Callable
+
+from PySide6.QtCore import QCoreApplication, QObject, Qt, Signal
 
 
 class SGSignals(Enum):
     SGDB_SIGSTART = "GDB_SIGSTART"
     SGDB_SIGEND = "GDB_SIGEND"
+    # payload: the model's StopSnapshot
+    SGDB_SIGSTOPPED = "GDB_SIGSTOPPED"
+    # payload: a console/target/log stream record
+    SGDB_SIGCONSOLE = "GDB_SIGCONSOLE"
+
+# only the latest one of these matters, a burst of them gets delivered once
+COALESCED = {SGSignals.SGDB_SIGSTOPPED}
+
+# runs functions on the thread it lives in, which is the GUI one
+class GuiDispatcher(QObject):
+    deliver = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.deliver.connect(self.run, Qt.ConnectionType.QueuedConnection)
+
+    def run(self, function: Callable):
+        function()
+
+guiDispatcher: GuiDispatcher | None = None
+dispatcherLock = Lock()
+
+# call on the GUI thread once the application exists, before any other
+# thread can runOnGui(). if nobody did, the first runOnGui() makes it
+def startGuiDispatcher() -> GuiDispatcher:
+    global guiDispatcher
+    with dispatcherLock:
+        if (guiDispatcher is None):
+            guiDispatcher = GuiDispatcher()
+            app = QCoreApplication.instance()
+            if (app is not None):
+                guiDispatcher.moveToThread(app.thread())
+
+    return guiDispatcher
+
+# the ways a subscriber can get called: any function that takes a function
+# and runs it somewhere works, like GdbWorker.call for the GDB thread
+def runOnGui(function: Callable):
+    (guiDispatcher or startGuiDispatcher()).deliver.emit(function)
+
+# right away, on whatever thread called notify()
+def runDirect(function: Callable):
+    function()
 
 observers = dict()
+# payloads of coalesced signals waiting to be delivered, by (signal, function)
+pending = dict()
+lock = Lock()
+
+# with a sender, only that sender's notifications get delivered (e.g. the
+# views of one target only hear about that target)
+def subscribe(signal: SGSignals, function: Callable, on: Callable[[Callable], Any] = runOnGui, sender: Any = None):
+    with lock:
+        if (signal not in observers):
+            observers[signal] = list()
+
+        observers[signal].append((function, on, sender))
+
+def unsubscribe(signal: SGSignals, function: Callable):
+    with lock:
+        observers[signal] = [o for o in observers.get(signal, []) if o[0] != function]
 
-def subscribe(signal: SGSignals, function: Callable):
-    if (signal not in observers):
-        observers[signal] = list()
+def call(function: Callable, payload: Any):
+    if (payload is None):
+        function()
+    else:
+        function(payload)
 
-    observers[signal].append(function)
+def deliverLatest(key: tuple):
+    with lock:
+        payload = pending.pop(key)
 
-def notify(signal):
-    if (signal not in observers):
+    call(key[1], payload)
+
+def notify(signal, payload: Any = None, sender: Any = None):
+    with lock:
+        subscribers = [o for o in observers.get(signal, []) if o[2] is None or o[2] is sender]
+
+    if (not subscribers):
         return -1
 
-    for fun in observers[signal]:
-        fun()
+    for fun, on, _ in subscribers:
+        if (signal not in COALESCED):
+            on(lambda fun=fun: call(fun, payload))
+            continue
+
+        key = (signal, fun)
+        with lock:
+            scheduled = key in pending
+            pending[key] = payload
+
+        if (not scheduled):
+            on(lambda key=key: deliverLatest(key))
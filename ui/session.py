@@ -0,0 +1,80 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field, fields
+
+from loguru import logger
+
+from misc import misc
+
+# a SideGDB configuration (like test_config.json) plus what we were doing
+# with it: breakpoints, watches and where the windows were
+@dataclass
+class Session:
+    sessionName: str = "New session"
+    programPath: str = ""
+    gdbScriptPath: str = ""
+    # see PreRunExecutor for what a step can be
+    preRunCommands: list[str | list[str] | dict] = field(default_factory=list)
+
+    # positions as -break-insert takes them
+    breakpoints: list[str] = field(default_factory=list)
+    watches: list[str] = field(default_factory=list)
+    # window name -> [x, y, width, height]
+    layout: dict[str, list[int]] = field(default_factory=dict)
+
+    # where it was loaded from/saved to, not saved itself
+    path: str = field(default="", compare=False)
+
+    @staticmethod
+    def load(path: str) -> "Session":
+        with open(path, "r") as sessionFile:
+            saved = json.load(sessionFile)
+        if (not isinstance(saved, dict)):
+            raise ValueError("not a SideGDB session")
+
+        known = {f.name for f in fields(Session) if f.name != "path"}
+        session = Session(**{key: value for key, value in saved.items() if key in known})
+        session.path = path
+
+        # opened is as recent as saved
+        rememberSession(session)
+        return session
+
+    def save(self, path: str | None = None):
+        self.path = path or self.path
+        saved = asdict(self)
+        saved.pop("path")
+
+        with open(self.path, "w") as sessionFile:
+            json.dump(saved, sessionFile, indent=2)
+
+        rememberSession(self)
+
+# the recent sessions list lives in its own small file, so the launcher
+# doesn't have to open every session to show it
+MAX_RECENT_SESSIONS = 10
+
+def recentSessionsPath() -> str:
+    return os.path.join(misc.cacheDir(), "recent_sessions.json")
+
+# [{"name": ..., "path": ...}], most recent first
+def recentSessions() -> list[dict]:
+    try:
+        with open(recentSessionsPath(), "r") as recentFile:
+            return json.load(recentFile)
+    except (OSError, ValueError):
+        return []
+
+def rememberSession(session: Session):
+    if (not session.path):
+        return
+
+    path = os.path.abspath(session.path)
+    recent = [r for r in recentSessions() if r.get("path") != path]
+    recent.insert(0, {"name": session.sessionName, "path": path})
+
+    try:
+        with open(recentSessionsPath(), "w") as recentFile:
+            json.dump(recent[:MAX_RECENT_SESSIONS], recentFile)
+    except OSError as e:
+        logger.warning(f"Couldn't update the recent sessions: {e}")
@@ -0,0 +1,263 @@
+import os
+
+from loguru import logger
+from PySide6.QtWidgets import QMessageBox
+from typing_extensions import Callable
+
+from backend.prerun import PreRunExecutor
+from backend.source import SourceDocument
+from ui import observer
+from ui.gdb_worker import GdbWorker
+from ui.main_view import MainView
+from ui.main_views.stats_view import StatsDialog
+from ui.model import SGDBModel, StopSnapshot
+from ui.model_types import Frame
+from ui.session import Session
+
+# one debugged target: its session, its own GDB (with its worker and
+# caches) and its own windows. targets don't share anything, an idle one
+# costs nothing but two threads waiting
+class TargetController:
+    def __init__(self, view: MainView, session: Session, index: int, onStateChanged: Callable[[], None] | None = None):
+        self.view = view
+        self.session = session
+        self.windows = view.createTargetWindows(session.sessionName, index)
+        # called when the pre-run commands start or finish
+        self.onStateChanged = onStateChanged or (lambda: None)
+
+        self.worker: GdbWorker | None = None
+        self.model: SGDBModel | None = None
+
+        # GDB starts and loads the program while these build it, the GDB
+        # script and breakpoints wait for both
+        self.preRun: PreRunExecutor | None = None
+        self.preRunSucceeded: bool | None = None
+        # the finished one, if it left background steps (like QEMU) running
+        self.preRunBackground: PreRunExecutor | None = None
+        self.attached = False
+        # GDB couldn't start, the target can be restarted or closed
+        self.failed = False
+        # queued signals can still arrive after stop(), they get dropped
+        self.closed = False
+        # made the first time it's asked for, then shown again
+        self.statsDialog: StatsDialog | None = None
+        # bumped for every frame shown, only the latest one's source gets shown
+        self.sourceRequest = 0
+
+        # only this target's notifications
+        observer.subscribe(observer.SGSignals.SGDB_SIGSTOPPED, self.onStopped, sender=self)
+        # the console buffers on its own and draws once a frame, so records
+        # go straight in from whatever thread they come from
+        observer.subscribe(observer.SGSignals.SGDB_SIGCONSOLE, self.onConsole, on=observer.runDirect, sender=self)
+
+        self.windows.rightSubWindow.stackView.frameActivated.connect(self.showFrame)
+
+    def start(self):
+        self.failed = False
+        self.startGdb()
+        self.startPreRun()
+
+    # from scratch: GDB, pre-run commands and the session
+    def restart(self):
+        if (self.closed):
+            return
+
+        self.stopGdb()
+        self.start()
+        self.onStateChanged()
+
+    def stop(self):
+        self.closed = True
+        self.stopGdb()
+        observer.unsubscribe(observer.SGSignals.SGDB_SIGSTOPPED, self.onStopped)
+        observer.unsubscribe(observer.SGSignals.SGDB_SIGCONSOLE, self.onConsole)
+        self.windows.close()
+
+        if (self.statsDialog is not None):
+            self.statsDialog.close()
+            self.statsDialog.deleteLater()
+            self.statsDialog = None
+
+    def showStats(self):
+        if (self.model is None):
+            return
+
+        if (self.statsDialog is None):
+            self.statsDialog = StatsDialog(self.model.gdbMI.stats, self.session.sessionName, self.view)
+
+        self.statsDialog.show()
+        self.statsDialog.raise_()
+        self.statsDialog.activateWindow()
+
+    def startPreRun(self):
+        if (not self.session.preRunCommands):
+            self.preRunSucceeded = True
+            return
+
+        cwd = os.path.dirname(os.path.abspath(self.session.path)) if self.session.path else None
+        executor = PreRunExecutor(self.session.preRunCommands, self.onPreRunOutput, cwd)
+        self.preRun = executor
+        self.preRunSucceeded = None
+        self.onStateChanged()
+
+        executor.start().add_done_callback(
+            lambda future: observer.runOnGui(lambda: self.onPreRunFinished(executor, future.result())))
+
+    def cancelPreRun(self):
+        if (self.preRun is not None):
+            self.preRun.cancel()
+
+    def stopPreRunBackground(self):
+        if (self.preRunBackground is not None):
+            self.preRunBackground.cancel()
+            self.preRunBackground = None
+
+    # on the pre-run reader threads, the output looks like the target's to the console
+    def onPreRunOutput(self, command: str, text: str):
+        observer.notify(observer.SGSignals.SGDB_SIGCONSOLE,
+                        {"type": "target", "message": None, "payload": text, "token": None, "stream": "prerun"},
+                        sender=self)
+
+    def onPreRunFinished(self, executor: PreRunExecutor, success: bool):
+        # a target that's been closed since
+        if (executor is not self.preRun):
+            return
+
+        self.preRun = None
+        self.preRunSucceeded = success
+        self.onStateChanged()
+
+        if (not success):
+            message = "cancelled" if executor.cancelled else "failed"
+            self.onPreRunOutput("", f"Pre-run commands {message}, not running the GDB script\n")
+            # nothing to debug, whatever it left running goes too
+            executor.cancel()
+        elif (executor.background):
+            self.preRunBackground = executor
+
+        self.attachWhenReady()
+
+    def attachWhenReady(self):
+        if (self.model is None or not self.preRunSucceeded or self.attached):
+            return
+
+        self.attached = True
+        self.worker.call(self.model.attachSession, self.session,
+                         errback=lambda e: logger.error(f"Couldn't restore session {self.session.sessionName}: {e}"))
+
+    # breakpoints, watches and window layout go back into the session
+    def saveSession(self):
+        if (self.model is not None):
+            self.session.breakpoints = self.model.sessionBreakpoints(self.session.breakpoints)
+            self.session.watches = list(self.model.watches)
+        self.session.layout = self.view.saveLayout(self.windows)
+
+        self.session.save()
+
+    def startGdb(self):
+        self.attached = False
+        worker = GdbWorker([], onStreamRecord=self.onStreamRecord)
+        self.worker = worker
+        self.worker.gdbStarted.connect(self.onGdbStarted)
+        self.worker.gdbFailed.connect(lambda message: self.onGdbFailed(worker, message))
+        self.worker.recordReceived.connect(self.onRecord)
+        self.worker.start()
+
+    def stopGdb(self):
+        self.cancelPreRun()
+        self.preRun = None
+        self.stopPreRunBackground()
+        if (self.worker is None):
+            return
+
+        if (self.model is not None):
+            logger.debug(f"GDB statistics for {self.session.sessionName}:\n{self.model.gdbMI.stats.dump()}")
+        self.worker.stop(self.model.saveCaches if self.model is not None else None)
+        self.worker = None
+        self.model = None
+
+    def onGdbStarted(self, model: SGDBModel):
+        if (self.closed):
+            return
+
+        self.model = model
+        self.windows.bottomSubWindow.memoryView.setMemoryManager(model.memMgr, self.worker)
+        self.windows.rightSubWindow.setModel(model, self.worker)
+        # first thing on the worker, before anything the views ask for
+        self.worker.call(model.loadSession, self.session,
+                         errback=lambda e: logger.error(f"Couldn't load {self.session.programPath}: {e}"))
+        self.attachWhenReady()
+
+    def onGdbFailed(self, worker: GdbWorker, message: str):
+        # a worker that's been replaced or stopped since
+        if (self.closed or worker is not self.worker):
+            return
+
+        # its thread is already done, there's nothing to stop but the pre-run commands
+        self.worker = None
+        self.model = None
+        self.cancelPreRun()
+        self.preRun = None
+        self.stopPreRunBackground()
+        self.failed = True
+        self.onStateChanged()
+
+        self.onPreRunOutput("", f"Couldn't start GDB: {message}\n")
+        QMessageBox.critical(self.view, self.session.sessionName,
+                             f"Couldn't start GDB:\n{message}\n\nFix it and restart the target, or quit the session.")
+
+    # on GDB's reader thread, the console buffers them and draws once a frame
+    def onStreamRecord(self, record: dict):
+        if (not self.closed):
+            observer.notify(observer.SGSignals.SGDB_SIGCONSOLE, record, sender=self)
+
+    # one record from GDB, one query, every view gets the result through the observer
+    def onRecord(self, record: dict):
+        if (self.closed):
+            return
+
+        if (record.get("type") == "notify" and record.get("message") == "stopped"):
+            frame = (record.get("payload") or {}).get("frame") or {}
+            pc = int(frame["addr"], 16) if "addr" in frame else None
+            self.worker.call(self.refreshOnStop, self.model, pc)
+
+    # on the worker thread
+    def refreshOnStop(self, model: SGDBModel, pc: int | None):
+        snapshot = model.refreshOnStop(pc)
+        observer.notify(observer.SGSignals.SGDB_SIGSTOPPED, snapshot, sender=self)
+
+        # the views have what they need, now the other threads' stacks
+        model.prefetchStacks(snapshot.threads)
+
+    def onStopped(self, snapshot: StopSnapshot):
+        if (self.closed):
+            return
+
+        self.windows.bottomSubWindow.memoryView.refresh()
+        self.windows.rightSubWindow.showSnapshot(snapshot)
+
+        threads = snapshot.threads
+        self.showFrame(next((t.frame for t in threads.threads if t.id == threads.currentThread), None))
+
+    # the file is read and indexed on the worker, it's shown once that's done
+    def showFrame(self, frame: Frame | None):
+        if (frame is None or self.model is None):
+            return
+
+        self.sourceRequest += 1
+        request = self.sourceRequest
+        self.worker.call(self.model.loadSource, frame.fullname, frame.file,
+                         callback=lambda source: self.onSourceLoaded(request, source, frame.line))
+
+    def onSourceLoaded(self, request: int, source: SourceDocument | None, line: int | None):
+        # stopped somewhere else since
+        if (self.closed or request != self.sourceRequest or source is None):
+            return
+
+        self.windows.codeSubWindow.showSource(source, line)
+
+    def onConsole(self, record: dict):
+        if (self.closed):
+            return
+
+        self.windows.bottomSubWindow.consoleView.appendRecord(record)